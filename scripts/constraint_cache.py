@@ -0,0 +1,70 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+import fair.constraint
+from fair.constraint import CourseTimeConstraint, MutualExclusivityConstraint
+from fair.feature import Course, Slot, Weekday
+from fair.item import ScheduleItem
+
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "fair",
+)
+
+
+def load_global_constraints(
+    excel_path: str,
+    schedule: list[ScheduleItem],
+    course: Course,
+    slot: Slot,
+    weekday: Weekday,
+    sparse: bool,
+    cache_dir: str = CACHE_DIR,
+):
+    """Build course time and section constraints, caching them on disk
+
+    The constraints are pickled to a per-user cache directory under a key derived from
+    the schedule file, the source of fair.constraint and sparsity, so a cache written
+    by a different version of the constraint classes is never loaded. An unreadable
+    cache is rebuilt, and writing it is best-effort.
+
+    Args:
+        excel_path (str): Full path to the excel file the schedule was read from
+        schedule (list[ScheduleItem]): All items in the schedule
+        course (Course): Feature for course
+        slot (Slot): Feature for time slots
+        weekday (Weekday): Feature for weekdays
+        sparse (bool): Should A and b be sparse matrices
+        cache_dir (str, optional): Directory of the cache. Defaults to CACHE_DIR.
+
+    Returns:
+        list[LinearConstraint]: Course time and mutual exclusivity constraints
+    """
+    digest = hashlib.sha256()
+    for path in [excel_path, fair.constraint.__file__]:
+        with open(path, "rb") as fd:
+            digest.update(fd.read())
+    cache = os.path.join(cache_dir, f"constraints_{digest.hexdigest()}_{sparse}.pkl")
+    try:
+        with open(cache, "rb") as fd:
+            return pickle.load(fd)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        pass
+
+    constraints = [
+        CourseTimeConstraint.from_items(schedule, slot, weekday, sparse),
+        MutualExclusivityConstraint.from_items(schedule, course, sparse),
+    ]
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        # write to a temporary file first, so an interrupted or concurrent run never
+        # leaves a truncated cache behind
+        with tempfile.NamedTemporaryFile("wb", dir=cache_dir, delete=False) as fd:
+            pickle.dump(constraints, fd)
+        os.replace(fd.name, cache)
+    except OSError:
+        pass
+
+    return constraints
@@ -1,24 +1,20 @@
 import os
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
-import pandas as pd
+import numpy as np
+from constraint_cache import CACHE_DIR, load_global_constraints
 
 from fair.agent import LegacyStudent
 from fair.allocation import general_yankee_swap_E, round_robin, serial_dictatorship
-from fair.constraint import CourseTimeConstraint, MutualExclusivityConstraint
-from fair.envy import (
-    EF_violations,
-    EF1_violations,
-    EFX_violations,
-)
-from fair.feature import Course, Section, Slot, Weekday, slots_for_time_range
-from fair.item import ScheduleItem
+from fair.envy import envy_all
+from fair.feature import Course, Section, Slot, Weekday
+from fair.item import ScheduleItem, load_schedule
 from fair.metrics import (
+    PMMS_violations,
     leximin,
     nash_welfare,
-    utilitarian_welfare,
     precompute_bundles_valuations,
-    PMMS_violations,
+    utilitarian_welfare,
 )
 from fair.optimization import StudentAllocationProgram
 from fair.simulation import RenaissanceMan
@@ -30,151 +26,188 @@ UPPER_MAX_COURSES_TOTAL = 5
 EXCEL_SCHEDULE_PATH = os.path.join(
     os.path.dirname(__file__), "../resources/fall2023schedule-2-cat.xlsx"
 )
+SCHEDULE_CACHE_PATH = os.path.join(
+    CACHE_DIR, os.path.basename(EXCEL_SCHEDULE_PATH) + ".pkl"
+)
 SPARSE = False
 FIND_OPTIMAL = True
 
-# load schedule as DataFrame
-with open(EXCEL_SCHEDULE_PATH, "rb") as fd:
-    df = pd.read_excel(fd)
-
-# construct features from DataFrame
-course = Course(df["Catalog"].astype(str).unique().tolist())
-
-time_ranges = df["Mtg Time"].dropna().unique()
-slot = Slot.from_time_ranges(time_ranges, "15T")
-weekday = Weekday()
-
-section = Section(df["Section"].dropna().unique().tolist())
-features = [course, slot, weekday, section]
-
-# construct schedule
-schedule = []
-topic_map = defaultdict(list)
-for idx, (_, row) in enumerate(df.iterrows()):
-    crs = str(row["Catalog"])
-    slt = slots_for_time_range(row["Mtg Time"], slot.times)
-    sec = row["Section"]
-    capacity = row["CICScapacity"]
-    dys = tuple([day.strip() for day in row["zc.days"].split(" ")])
-    item = ScheduleItem(features, [crs, slt, dys, sec], index=idx, capacity=capacity)
-    schedule.append(item)
-    topic_map[row["Categories"]].append(item)
-
-topics = [topic for topic in topic_map.values()]
-
-# global constraints
-course_time_constr = CourseTimeConstraint.from_items(schedule, slot, weekday, SPARSE)
-course_sect_constr = MutualExclusivityConstraint.from_items(schedule, course, SPARSE)
-
-# randomly generate students
-students = []
-for i in range(NUM_STUDENTS):
+
+# state shared by every student, set once per worker process by init_worker
+_worker_state = {}
+
+
+def init_worker(
+    topics: list[list[ScheduleItem]],
+    course: Course,
+    section: Section,
+    global_constraints: list,
+    schedule: list[ScheduleItem],
+):
+    """Store the state shared by all students in a worker process
+
+    Passed as the pool initializer, so the schedule and constraints are sent to each
+    worker once rather than with every student.
+
+    Args:
+        topics (list[list[ScheduleItem]]): A list of lists of course items, one per topic
+        course (Course): Feature for course
+        section (Section): Feature for section
+        global_constraints (list): Constraints not specific to any student
+        schedule (list[ScheduleItem]): All possible items in the students' schedules
+    """
+    _worker_state.update(
+        topics=topics,
+        course=course,
+        section=section,
+        global_constraints=global_constraints,
+        schedule=schedule,
+    )
+
+
+def build_student(seed: int):
+    """Randomly generate a student and compile their valuation
+
+    Defined at module level so that it can be dispatched to worker processes, which
+    must have been set up with init_worker.
+
+    Args:
+        seed (int): Random seed for the student
+
+    Returns:
+        LegacyStudent: Student with compiled valuation
+    """
+    topics = _worker_state["topics"]
+    course = _worker_state["course"]
     student = RenaissanceMan(
         topics,
         [min(len(topic), MAX_COURSES_PER_TOPIC) for topic in topics],
         LOWER_MAX_COURSES_TOTAL,
         UPPER_MAX_COURSES_TOTAL,
         course,
-        section,
-        [course_time_constr, course_sect_constr],
-        schedule,
-        seed=i,
+        _worker_state["section"],
+        _worker_state["global_constraints"],
+        _worker_state["schedule"],
+        seed=seed,
         sparse=SPARSE,
     )
     legacy_student = LegacyStudent(student, student.preferred_courses, course)
     legacy_student.student.valuation.valuation = (
         legacy_student.student.valuation.compile()
     )
-    students.append(legacy_student)
-
-X_YS, _, _ = general_yankee_swap_E(students, schedule)
-print("YS utilitarian welfare: ", utilitarian_welfare(X_YS, students, schedule))
-print("YS nash welfare: ", nash_welfare(X_YS, students, schedule))
-print("YS leximin vector: ", leximin((X_YS), students, schedule))
-bundles, valuations = precompute_bundles_valuations(X_YS, students, schedule)
-print(
-    "YS EF violations (total, agents): ",
-    EF_violations(X_YS, students, schedule, valuations),
-)
-print(
-    "YS EF-1 violations (total, agents): ",
-    EF1_violations(X_YS, students, schedule, bundles, valuations),
-)
-print(
-    "YS EF-X violations (total, agents): ",
-    EFX_violations(X_YS, students, schedule, bundles, valuations),
-)
-print(
-    "YS PMMS violations (total, agents): ",
-    PMMS_violations(X_YS, students, schedule, bundles, valuations),
-)
 
-X_SD = serial_dictatorship(students, schedule)
-print("SD utilitarian welfare: ", utilitarian_welfare(X_SD, students, schedule))
-print("SD nash welfare: ", nash_welfare(X_SD, students, schedule))
-print("SD leximin vector: ", leximin(X_SD, students, schedule))
-bundles, valuations = precompute_bundles_valuations(X_SD, students, schedule)
-print(
-    "SD EF violations (total, agents): ",
-    EF_violations(X_SD, students, schedule, valuations),
-)
-print(
-    "SD EF-1 violations (total, agents): ",
-    EF1_violations(X_SD, students, schedule, bundles, valuations),
-)
-print(
-    "SD EF-X violations (total, agents): ",
-    EFX_violations(X_SD, students, schedule, bundles, valuations),
-)
-print(
-    "SD PMMS violations (total, agents): ",
-    PMMS_violations(X_SD, students, schedule, bundles, valuations),
-)
+    return legacy_student
+
+
+def report(
+    X: type[np.ndarray],
+    label: str,
+    students: list[LegacyStudent],
+    schedule: list[ScheduleItem],
+):
+    """Print welfare and fairness metrics for an allocation
+
+    Bundles and valuations are computed once and shared by all metrics.
+
+    Args:
+        X (type[np.ndarray]): Allocation matrix
+        label (str): Name of the allocation algorithm
+        students (list[LegacyStudent]): Students that received the allocation
+        schedule (list[ScheduleItem]): Items that were allocated
+    """
+    bundles, valuations = precompute_bundles_valuations(X, students, schedule)
+    print(
+        f"{label} utilitarian welfare: ",
+        utilitarian_welfare(X, students, schedule, valuations),
+    )
+    print(f"{label} nash welfare: ", nash_welfare(X, students, schedule, valuations))
+    print(f"{label} leximin vector: ", leximin(X, students, schedule, valuations))
+    envy = envy_all(X, students, schedule, bundles, valuations)
+    print(f"{label} EF violations (total, agents): ", envy["EF"])
+    print(f"{label} EF-1 violations (total, agents): ", envy["EF1"])
+    print(f"{label} EF-X violations (total, agents): ", envy["EFX"])
+    print(
+        f"{label} PMMS violations (total, agents): ",
+        PMMS_violations(X, students, schedule, bundles, valuations),
+    )
 
-X_RR = round_robin(students, schedule)
-print("RR utilitarian welfare: ", utilitarian_welfare(X_RR, students, schedule))
-print("RR nash welfare: ", nash_welfare(X_RR, students, schedule))
-print("RR leximin vector: ", leximin(X_RR, students, schedule))
-bundles, valuations = precompute_bundles_valuations(X_RR, students, schedule)
-print(
-    "RR EF violations (total, agents): ",
-    EF_violations(X_RR, students, schedule, valuations),
-)
-print(
-    "RR EF-1 violations (total, agents): ",
-    EF1_violations(X_RR, students, schedule, bundles, valuations),
-)
-print(
-    "RR EF-X violations (total, agents): ",
-    EFX_violations(X_RR, students, schedule, bundles, valuations),
-)
-print(
-    "RR PMMS violations (total, agents): ",
-    PMMS_violations(X_RR, students, schedule, bundles, valuations),
-)
 
+if __name__ == "__main__":
+    # load schedule as DataFrame
+    df = load_schedule(EXCEL_SCHEDULE_PATH, SCHEDULE_CACHE_PATH)
 
-orig_students = [student.student for student in students]
-program = StudentAllocationProgram(orig_students, schedule).compile()
-opt_alloc = program.formulateUSW().solve()
-X_ILP = opt_alloc.reshape(len(students), len(schedule)).transpose()
-print("ILP utilitarian welfare: ", utilitarian_welfare(X_ILP, students, schedule))
-print("ILP nash welfare: ", nash_welfare(X_ILP, students, schedule))
-print("ILP leximin vector: ", leximin(X_ILP, students, schedule))
-bundles, valuations = precompute_bundles_valuations(X_ILP, students, schedule)
-print(
-    "ILP EF violations (total, agents): ",
-    EF_violations(X_ILP, students, schedule, valuations),
-)
-print(
-    "ILP EF-1 violations (total, agents): ",
-    EF1_violations(X_ILP, students, schedule, bundles, valuations),
-)
-print(
-    "ILP EF-X violations (total, agents): ",
-    EFX_violations(X_ILP, students, schedule, bundles, valuations),
-)
-print(
-    "ILP PMMS violations (total, agents): ",
-    PMMS_violations(X_ILP, students, schedule, bundles, valuations),
-)
+    # intern repeated values; unique() on a categorical keeps first-appearance order
+    df["Catalog"] = df["Catalog"].astype(str)
+    for col in ["Catalog", "Section", "Mtg Time", "zc.days", "Categories"]:
+        df[col] = df[col].astype("category")
+
+    # construct features from DataFrame
+    course = Course(df["Catalog"].unique().tolist())
+
+    time_ranges = df["Mtg Time"].dropna().unique()
+    slot = Slot.from_time_ranges(time_ranges, "15T")
+    weekday = Weekday()
+
+    section = Section(df["Section"].dropna().unique().tolist())
+    features = [course, slot, weekday, section]
+
+    # construct schedule
+    # slot domain is ordered as time_ranges, so each range is only parsed once
+    slots_map = dict(zip(time_ranges, slot.domain))
+    rows = zip(
+        df["Catalog"].tolist(),
+        df["Mtg Time"].tolist(),
+        df["Section"].tolist(),
+        df["CICScapacity"].tolist(),
+        df["zc.days"].str.split().map(tuple).tolist(),
+    )
+    schedule = []
+    for idx, (crs, tm, sec, capacity, dys) in enumerate(rows):
+        slt = slots_map[tm]
+        item = ScheduleItem(
+            features, [crs, slt, dys, sec], index=idx, capacity=capacity
+        )
+        schedule.append(item)
+
+    # topics in order of first appearance, items in schedule order
+    topics = [
+        [schedule[idx] for idx in group.index]
+        for _, group in df.groupby("Categories", sort=False, observed=True)
+    ]
+
+    # global constraints
+    course_time_constr, course_sect_constr = load_global_constraints(
+        EXCEL_SCHEDULE_PATH, schedule, course, slot, weekday, SPARSE
+    )
+
+    # randomly generate students
+    shared = (
+        topics,
+        course,
+        section,
+        [course_time_constr, course_sect_constr],
+        schedule,
+    )
+    with ProcessPoolExecutor(
+        max_workers=os.cpu_count(), initializer=init_worker, initargs=shared
+    ) as executor:
+        students = list(executor.map(build_student, range(NUM_STUDENTS)))
+
+    # most constrained students first, so conflicts surface early in each algorithm
+    students.sort(key=lambda student: len(student.preferred_courses))
+
+    X_YS, _, _ = general_yankee_swap_E(students, schedule)
+    report(X_YS, "YS", students, schedule)
+
+    X_SD = serial_dictatorship(students, schedule)
+    report(X_SD, "SD", students, schedule)
+
+    X_RR = round_robin(students, schedule)
+    report(X_RR, "RR", students, schedule)
+
+    orig_students = [student.student for student in students]
+    program = StudentAllocationProgram(orig_students, schedule).compile()
+    opt_alloc = program.formulateUSW().solve()
+    # contiguous (items x students), laid out like the other allocation matrices
+    X_ILP = opt_alloc.reshape(len(students), len(schedule)).T.copy()
+    report(X_ILP, "ILP", students, schedule)
@@ -1,15 +1,13 @@
 import os
-from collections import defaultdict
 
 import numpy as np
-import pandas as pd
+from constraint_cache import CACHE_DIR, load_global_constraints
 from matplotlib import pyplot as plt
 from sklearn.decomposition import PCA
 
 from fair.agent import LegacyStudent
-from fair.constraint import CourseTimeConstraint, MutualExclusivityConstraint
-from fair.feature import Course, Section, Slot, Weekday, slots_for_time_range
-from fair.item import ScheduleItem
+from fair.feature import Course, Section, Slot, Weekday
+from fair.item import ScheduleItem, load_schedule
 from fair.simulation import RenaissanceMan
 from fair.stats.survey import Corpus, SingleTopicSurvey
 
@@ -24,15 +22,23 @@ UPPER_MAX_COURSES_TOTAL = 5
 EXCEL_SCHEDULE_PATH = os.path.join(
     os.path.dirname(__file__), "../resources/fall2023schedule-2-cat.xlsx"
 )
+SCHEDULE_CACHE_PATH = os.path.join(
+    CACHE_DIR, os.path.basename(EXCEL_SCHEDULE_PATH) + ".pkl"
+)
 SPARSE = False
 FIND_OPTIMAL = True
 
+
 # load schedule as DataFrame
-with open(EXCEL_SCHEDULE_PATH, "rb") as fd:
-    df = pd.read_excel(fd)
+df = load_schedule(EXCEL_SCHEDULE_PATH, SCHEDULE_CACHE_PATH)
+
+# intern repeated values; unique() on a categorical keeps first-appearance order
+df["Catalog"] = df["Catalog"].astype(str)
+for col in ["Catalog", "Section", "Mtg Time", "zc.days", "Categories"]:
+    df[col] = df[col].astype("category")
 
 # construct features from DataFrame
-course = Course(df["Catalog"].astype(str).unique().tolist())
+course = Course(df["Catalog"].unique().tolist())
 
 time_ranges = df["Mtg Time"].dropna().unique()
 slot = Slot.from_time_ranges(time_ranges, "15T")
@@ -42,23 +48,31 @@ section = Section(df["Section"].dropna().unique().tolist())
 features = [course, slot, weekday, section]
 
 # construct schedule
+# slot domain is ordered as time_ranges, so each range is only parsed once
+slots_map = dict(zip(time_ranges, slot.domain))
+rows = zip(
+    df["Catalog"].tolist(),
+    df["Mtg Time"].tolist(),
+    df["Section"].tolist(),
+    df["CICScapacity"].tolist(),
+    df["zc.days"].str.split().map(tuple).tolist(),
+)
 schedule = []
-topic_map = defaultdict(list)
-for idx, (_, row) in enumerate(df.iterrows()):
-    crs = str(row["Catalog"])
-    slt = slots_for_time_range(row["Mtg Time"], slot.times)
-    sec = row["Section"]
-    capacity = row["CICScapacity"]
-    dys = tuple([day.strip() for day in row["zc.days"].split(" ")])
+for idx, (crs, tm, sec, capacity, dys) in enumerate(rows):
+    slt = slots_map[tm]
     item = ScheduleItem(features, [crs, slt, dys, sec], index=idx, capacity=capacity)
     schedule.append(item)
-    topic_map[row["Categories"]].append(item)
 
-topics = [topic for topic in topic_map.values()]
+# topics in order of first appearance, items in schedule order
+topics = [
+    [schedule[idx] for idx in group.index]
+    for _, group in df.groupby("Categories", sort=False, observed=True)
+]
 
 # global constraints
-course_time_constr = CourseTimeConstraint.from_items(schedule, slot, weekday, SPARSE)
-course_sect_constr = MutualExclusivityConstraint.from_items(schedule, course, SPARSE)
+course_time_constr, course_sect_constr = load_global_constraints(
+    EXCEL_SCHEDULE_PATH, schedule, course, slot, weekday, SPARSE
+)
 
 # randomly generate students
 students = []
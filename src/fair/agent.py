@@ -7,6 +7,23 @@ from .item import BaseItem, ScheduleItem
 from .valuation import RankValuation, UniqueItemsValuation
 
 
+def _independent_batch(valuation: RankValuation, bundles: List[List[BaseItem]]):
+    """Independence of several bundles, for valuations with or without a batch check
+
+    Args:
+        valuation (BaseValuation): Valuation object to be used for checking independence
+        bundles (List[List[BaseItem]]): Items in each bundle
+
+    Returns:
+        List[bool]: True for every bundle that receives maximal value; False otherwise
+    """
+    independent_batch = getattr(valuation, "independent_batch", None)
+    if independent_batch is None:
+        return [valuation.independent(bundle) for bundle in bundles]
+
+    return independent_batch(bundles)
+
+
 def exchange_contribution(
     valuation: RankValuation,
     bundle: List[BaseItem],
@@ -80,6 +97,122 @@ def marginal_contribution(
     return new_val - current_val
 
 
+def exchange_contribution_batch(
+    valuation: RankValuation,
+    bundle: List[BaseItem],
+    og_item: BaseItem,
+    new_items: List[BaseItem],
+):
+    """Check for improvement in utility, for several candidate items
+
+    Equivalent to calling exchange_contribution for every item in new_items, but the value of the
+    original bundle is only computed once. When the bundle is independent, candidates are checked
+    for independence in one batch instead; this is exact as long as the value of a bundle equals
+    its size only when the bundle is independent, as it does for the greedy valuations in
+    fair.valuation
+
+
+    Args:
+        valuation (BaseValuation): Valuation object to be used for comparison
+        bundle (List[BaseItem]): Original set of items
+        og_item (BaseItem): Item to be removed
+        new_items (List[BaseItem]): Candidate items to be added, one at a time
+
+    Returns:
+        List[bool]: True for every candidate that keeps the same utility; False otherwise
+    """
+    if og_item not in bundle:
+        return [False] * len(new_items)
+
+    T0 = bundle.copy()
+    T0.remove(og_item)
+    og_val = valuation.value(bundle)
+
+    candidates = [
+        new_item
+        for new_item in new_items
+        if new_item != og_item and new_item not in bundle
+    ]
+    if og_val == len(bundle) and len(candidates) > 0:
+        # the exchanged bundle has the same size as an independent bundle, so it keeps
+        # the same utility exactly when it is independent as well
+        keeps_value = dict(
+            zip(
+                candidates,
+                _independent_batch(valuation, [T0 + [item] for item in candidates]),
+            )
+        )
+        return [bool(keeps_value.get(new_item, False)) for new_item in new_items]
+
+    return [
+        new_item != og_item
+        and new_item not in bundle
+        and valuation.value(T0 + [new_item]) == og_val
+        for new_item in new_items
+    ]
+
+
+def marginal_contribution_batch(
+    valuation: RankValuation, bundle: List[BaseItem], items: List[BaseItem]
+):
+    """Marginal change in utility, for several candidate items
+
+    Like calling marginal_contribution for every item in items, but the value of the bundle is
+    only computed once. When the bundle is independent, candidates are checked for independence
+    in one batch instead, and each gain is 1 if the larger bundle is independent and 0 otherwise.
+    This assumes adding an item never lowers the value, as for matroid rank valuations; with
+    other constraints a negative marginal contribution is reported as 0
+
+
+    Args:
+        valuation (BaseValuation): Valuation object to be used for computing utility
+        bundle (List[BaseItem]): Initial set of items
+        items (List[BaseItem]): Candidate items to be added, one at a time
+
+    Returns:
+        List[Any]: Change in value for every candidate
+    """
+    current_val = valuation.value(bundle)
+
+    candidates = [item for item in items if item not in bundle]
+    if current_val == len(bundle) and len(candidates) > 0:
+        # adding an item to an independent bundle raises the rank by one exactly when
+        # the larger bundle is independent as well, and leaves it unchanged otherwise
+        gains = dict(
+            zip(
+                candidates,
+                _independent_batch(valuation, [bundle + [item] for item in candidates]),
+            )
+        )
+        return [int(gains.get(item, False)) for item in items]
+
+    return [
+        0 if item in bundle else valuation.value(bundle + [item]) - current_val
+        for item in items
+    ]
+
+
+def item_contributions(valuation: RankValuation, bundle: List[BaseItem]):
+    """Change in utility from removing each item of a bundle
+
+    The value of the whole bundle is only computed once
+
+
+    Args:
+        valuation (BaseValuation): Valuation object to be used for computing utility
+        bundle (List[BaseItem]): Set of items
+
+    Returns:
+        List[Any]: Value lost by removing every item, one at a time, in bundle order
+    """
+    current_val = valuation.value(bundle)
+
+    return [
+        current_val - valuation.value(bundle[:i] + bundle[i + 1 :])
+        for i in range(len(bundle))
+    ]
+
+
 class BaseAgent:
     """A wrapper class for apply a valuation to bundles of items"""
 
@@ -151,6 +284,25 @@ class LegacyStudent:
         """
         return marginal_contribution(self.student.valuation, bundle, item)
 
+    def marginal_contribution_batch(
+        self, bundle: List[BaseItem], items: List[BaseItem]
+    ):
+        """Delegate to marginal_contribution_batch function
+
+        Args:
+            bundle (List[BaseItem]): Initial set of items
+            items (List[BaseItem]): Candidate items to be added, one at a time
+        """
+        return marginal_contribution_batch(self.student.valuation, bundle, items)
+
+    def item_contributions(self, bundle: List[BaseItem]):
+        """Delegate to item_contributions function
+
+        Args:
+            bundle (List[BaseItem]): Set of items
+        """
+        return item_contributions(self.student.valuation, bundle)
+
     def exchange_contribution(
         self, bundle: List[BaseItem], og_item: BaseItem, new_item: BaseItem
     ):
@@ -163,6 +315,20 @@ class LegacyStudent:
         """
         return exchange_contribution(self.student.valuation, bundle, og_item, new_item)
 
+    def exchange_contribution_batch(
+        self, bundle: List[BaseItem], og_item: BaseItem, new_items: List[BaseItem]
+    ):
+        """Delegate to exchange_contribution_batch function
+
+        Args:
+            bundle (List[BaseItem]): Initial set of items
+            og_item (BaseItem): Item to be removed
+            new_items (List[BaseItem]): Candidate items to be added, one at a time
+        """
+        return exchange_contribution_batch(
+            self.student.valuation, bundle, og_item, new_items
+        )
+
     def get_desired_items_indexes(self, items: List[BaseItem]):
         """Return subset of indices from items that are preferred by the student
 
@@ -1,5 +1,7 @@
+import heapq
 import time
-from queue import Queue
+from collections import deque
+from collections.abc import Callable
 
 import matplotlib.pyplot as plt
 import networkx as nx
@@ -26,9 +28,12 @@ def initialize_allocation_matrix(items: list[ScheduleItem], agents: list[BaseAge
     """
     n = len(items)
     m = len(agents) + 1
-    X = np.zeros([n, m], dtype=int)
-    for i in range(n):
-        X[i][m - 1] = items[i].capacity
+    capacities = [item.capacity for item in items]
+    # smallest signed type that holds every capacity, which only ever counts down to 0;
+    # capacities may be given as floats, which would otherwise yield a float type
+    dtype = np.min_scalar_type(-1 - int(max(capacities, default=1)))
+    X = np.zeros([n, m], dtype=dtype)
+    X[:, m - 1] = capacities
     return X
 
 
@@ -39,21 +44,104 @@ def initialize_exchange_graph(N: int):
     Initially, there are no edges between items, and an edge from every item node to node 't'.
     Disclaimer: The previous assumes that every items has capacity > 0
 
+    The graph is stored as successor dicts, G[u] holding the nodes v of every edge (u, v) as keys.
+    Dicts keep insertion order, so graph traversals, and hence allocations, are reproducible.
+
     Args:
         N (int): number of items
 
     Returns:
-        nx.graph: networkx graph object
+        dict[int | str, dict[int | str, None]]: successor dicts of the exchange graph
     """
-    exchange_graph = nx.DiGraph()
-    for i in range(N):
-        exchange_graph.add_node(i)
-    exchange_graph.add_node("t")
-    for i in range(N):
-        exchange_graph.add_edge(i, "t")
+    exchange_graph = {i: {"t": None} for i in range(N)}
+    exchange_graph["t"] = {}
     return exchange_graph
 
 
+def draw_exchange_graph(G: dict[int | str, dict[int | str, None]]):
+    """Plot exchange graph.
+
+    Args:
+        G (dict[int | str, dict[int | str, None]]): exchange graph
+    """
+    nx.draw(nx.from_dict_of_lists(G, create_using=nx.DiGraph), with_labels=True)
+    plt.show()
+
+
+def _draw_on_iter(G: dict[int | str, dict[int | str, None]], iteration: int):
+    """Draw the exchange graph, as an on_iter callback
+
+    Args:
+        G (dict[int | str, dict[int | str, None]]): exchange graph
+        iteration (int): current iteration, unused
+    """
+    draw_exchange_graph(G)
+
+
+def initialize_ownership(X: type[np.ndarray], num_agents: int):
+    """Index item ownership by agent and by item.
+
+    Bundles and owners are read from these sets, rather than by scanning the allocation matrix,
+    and kept in sync with X by update_allocation and update_allocation_E.
+
+    Args:
+        X (type[np.ndarray]): allocation matrix
+        num_agents (int): number of agents
+
+    Returns:
+        owned_items (list[set[int]]): indices of the items owned by each agent
+        item_owners (list[set[int]]): indices of the agents owning each item
+    """
+    owned = X[:, :num_agents].astype(int) == 1
+    owned_items = [set(np.flatnonzero(owned[:, j]).tolist()) for j in range(num_agents)]
+    item_owners = [set(np.flatnonzero(row).tolist()) for row in owned]
+    return owned_items, item_owners
+
+
+def transfer_item(
+    X: type[np.ndarray],
+    item_index: int,
+    agent_index: int,
+    owns: bool,
+    owned_items: list[set[int]] | None = None,
+    item_owners: list[set[int]] | None = None,
+):
+    """Give an item to an agent, or take it away, in X and in the ownership sets.
+
+    Args:
+        X (type[np.ndarray]): allocation matrix
+        item_index (int): index of the item
+        agent_index (int): index of the agent
+        owns (bool): whether the agent owns the item after the transfer
+        owned_items (list[set[int]], optional): indices of the items owned by each agent
+        item_owners (list[set[int]], optional): indices of the agents owning each item
+    """
+    X[item_index, agent_index] = int(owns)
+    if owned_items is None:
+        return
+    if owns:
+        owned_items[agent_index].add(item_index)
+        item_owners[item_index].add(agent_index)
+    else:
+        owned_items[agent_index].discard(item_index)
+        item_owners[item_index].discard(agent_index)
+
+
+def initialize_edge_matrix(N: int):
+    """Generate edge matrix.
+
+    Element E[i][j] lists the indices of the agents responsible for the edge (i, j) on the exchange graph.
+    The matrix is sparse, so each row is a dict holding only the pairs with at least one such agent.
+
+    Args:
+        N (int): number of items
+
+    Returns:
+        list[dict[int, list[int]]]: one dict per item
+    """
+    return [{} for _ in range(N)]
+
+
 """Retrieve/update information"""
 
 
@@ -64,6 +152,8 @@ def get_gain_function(
     agent_picked: int,
     criteria: str,
     weights: list[float],
+    owned_items: list[set[int]] | None = None,
+    utility: int | None = None,
 ):
     """
     Get agent's current gain function value.
@@ -78,13 +168,18 @@ def get_gain_function(
         agent_picked (int): index of the agent that just played
         criteria (str): general yankee swap criteria
         weights (list[float]): list of weights assigned to the agents, if any
+        owned_items (list[set[int]], optional): indices of the items owned by each agent
+        utility (int, optional): agent's current utility, if already known
 
     Returns:
         float: updated gain fucntion for the agent that just played
     """
-    agent = agents[agent_picked]
-    bundle = get_bundle_from_allocation_matrix(X, items, agent_picked)
-    val = agent.valuation(bundle)
+    if utility is not None:
+        val = utility
+    else:
+        agent = agents[agent_picked]
+        bundle = get_bundle_from_allocation_matrix(X, items, agent_picked, owned_items)
+        val = agent.valuation(bundle)
     if criteria == "LorenzDominance":
         return -val
     w_i = weights[agent_picked]
@@ -99,25 +194,83 @@ def get_gain_function(
         return w_i / (val + 1)
 
 
-def get_owners_list(X: type[np.ndarray], item_index: int):
+def _marginal_contributions(
+    agent: BaseAgent, bundle: list[ScheduleItem], items: list[ScheduleItem]
+):
+    """Marginal contribution of several items, for agents with or without a batch method
+
+    Args:
+        agent (BaseAgent): Agent to query
+        bundle (list[ScheduleItem]): Agent's current bundle
+        items (list[ScheduleItem]): Candidate items to be added, one at a time
+
+    Returns:
+        list[Any]: Change in value for every candidate
+    """
+    marginal_contribution_batch = getattr(agent, "marginal_contribution_batch", None)
+    if marginal_contribution_batch is None:
+        return [agent.marginal_contribution(bundle, item) for item in items]
+
+    return marginal_contribution_batch(bundle, items)
+
+
+def _exchange_contributions(
+    agent: BaseAgent,
+    bundle: list[ScheduleItem],
+    og_item: ScheduleItem,
+    new_items: list[ScheduleItem],
+):
+    """Exchange contribution of several items, for agents with or without a batch method
+
+    Args:
+        agent (BaseAgent): Agent to query
+        bundle (list[ScheduleItem]): Agent's current bundle
+        og_item (ScheduleItem): Item to be removed
+        new_items (list[ScheduleItem]): Candidate items to be added, one at a time
+
+    Returns:
+        list[bool]: True for every candidate that keeps the same utility; False otherwise
+    """
+    exchange_contribution_batch = getattr(agent, "exchange_contribution_batch", None)
+    if exchange_contribution_batch is None:
+        return [
+            agent.exchange_contribution(bundle, og_item, new_item)
+            for new_item in new_items
+        ]
+
+    return exchange_contribution_batch(bundle, og_item, new_items)
+
+
+def get_owners_list(
+    X: type[np.ndarray],
+    item_index: int,
+    item_owners: list[set[int]] | None = None,
+):
     """Get list of item's current owners.
 
     From the exchange matrix, list of indices of all agents that currently have certain item.
+    The last column of X holds remaining capacities rather than an agent, so it is never included.
+    If item_owners is given, owners are read from it instead.
 
     Args:
         X (type[np.ndarray]): Allocation matrix
         item_index (int): index of the item for which we want to get the owners
+        item_owners (list[set[int]], optional): indices of the agents owning each item
 
     Returns:
         list[int]: list of item's owners' indices
     """
-    item_list = X[item_index]
-    owners_list = np.nonzero(item_list)
-    return owners_list[0]
+    if item_owners is not None:
+        return sorted(item_owners[item_index])
+    # nonzero is markedly faster on a boolean row than on an integer one
+    return np.flatnonzero(X[item_index, :-1] != 0)
 
 
 def get_bundle_from_allocation_matrix(
-    X: type[np.ndarray], items: list[ScheduleItem], agent_index: int
+    X: type[np.ndarray],
+    items: list[ScheduleItem],
+    agent_index: int,
+    owned_items: list[set[int]] | None = None,
 ):
     """Get list of agent's current bundle
 
@@ -127,18 +280,21 @@ def get_bundle_from_allocation_matrix(
         X (type[np.ndarray]): Allocation matrix
         items (list[ScheduleItem]): List of items from class BaseItem
         agent_index (int): index of the agent for which we want to get the current bundle
+        owned_items (list[set[int]], optional): indices of the items owned by each agent, used instead of X if given
     Returns:
         list[ScheduleItem]: List of items from the BaseItem class currently owned by the agent
     """
-    bundle0 = []
-    items_list = X[:, agent_index]
-    for i in range(len(items_list)):
-        if int(items_list[i]) == 1:
-            bundle0.append(items[i])
-    return bundle0
+    return [
+        items[i]
+        for i in get_bundle_indexes_from_allocation_matrix(X, agent_index, owned_items)
+    ]
 
 
-def get_bundle_indexes_from_allocation_matrix(X: type[np.ndarray], agent_index: int):
+def get_bundle_indexes_from_allocation_matrix(
+    X: type[np.ndarray],
+    agent_index: int,
+    owned_items: list[set[int]] | None = None,
+):
     """Get list of agent's current bundle's indices.
 
     Get list of indices of all items currently owned by a certain agent (bundle), given the current allocation
@@ -146,51 +302,81 @@ def get_bundle_indexes_from_allocation_matrix(X: type[np.ndarray], agent_index:
     Args:
         X (type[np.ndarray]): Allocation matrix
         agent_index (int): index of the agent for which we want to get the current bundle
+        owned_items (list[set[int]], optional): indices of the items owned by each agent, used instead of X if given
     Returns:
         list[int]: List of indices of the items from the BaseItem class currently owned by the agent
     """
-    bundle_indexes = []
-    items_list = X[:, agent_index]
-    for i in range(len(items_list)):
-        if int(items_list[i]) == 1:
-            bundle_indexes.append(i)
-    return bundle_indexes
+    if owned_items is not None:
+        return sorted(owned_items[agent_index])
+    return np.flatnonzero(X[:, agent_index].astype(int) == 1).tolist()
+
+
+def get_desired_items(
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    agent_index: int,
+    desired_items: list[list[int]] | None = None,
+):
+    """Get list of indices of the items desired by an agent
+
+    Args:
+        agents (list[BaseAgent]): Agents from class BaseAgent
+        items (list[ScheduleItem]): Items from class BaseItem
+        agent_index (int): index of the agent
+        desired_items (list[list[int]], optional): indices of the items desired by each agent, precomputed
+
+    Returns:
+        list[int]: list of items indices
+    """
+    if desired_items is not None:
+        return desired_items[agent_index]
+    return agents[agent_index].get_desired_items_indexes(items)
 
 
 def get_multiple_agents_desired_items(
-    agents: list[BaseAgent], items: list[ScheduleItem], agents_indexes: list[int]
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    agents_indexes: list[int],
+    desired_items: list[list[int]] | None = None,
 ):
-    """Get list of unique desired items from union of items desired by multiple agents
+    """Get set of desired items from union of items desired by multiple agents
 
     Args:
         agents (list[BaseAgent]): Agents from class BaseAgent
         items (list[ScheduleItem]): Items from class BaseItem
         agents_indexes (list[int]): list of indices of agents
+        desired_items (list[list[int]], optional): indices of the items desired by each agent
 
     Returns:
-        list[int]: list of items indices
+        set[int]: set of items indices
     """
-    lis = []
+    desired = set()
     for agent_index in agents_indexes:
-        agent = agents[agent_index]
-        lis = lis + agent.get_desired_items_indexes(items)
-    return list(set(lis))
+        desired.update(get_desired_items(agents, items, agent_index, desired_items))
+    return desired
 
 
-def get_multiple_agents_bundles(X: type[np.ndarray], agents_indexes: list[int]):
-    """Get list of unique items from union of items owned by multiple agents
+def get_multiple_agents_bundles(
+    X: type[np.ndarray],
+    agents_indexes: list[int],
+    owned_items: list[set[int]] | None = None,
+):
+    """Get set of items from union of items owned by multiple agents
 
     Args:
         X (type[np.ndarray]): Allocation matrix
         agents_indexes (list[int]): list of indices of agents
+        owned_items (list[set[int]], optional): indices of the items owned by each agent
 
     Returns:
-        list[int]: list of items indices
+        set[int]: set of items indices
     """
-    lis = []
+    if owned_items is not None:
+        return set().union(*(owned_items[i] for i in agents_indexes))
+    bundles = set()
     for agent_index in agents_indexes:
-        lis = lis + get_bundle_indexes_from_allocation_matrix(X, agent_index)
-    return list(set(lis))
+        bundles.update(get_bundle_indexes_from_allocation_matrix(X, agent_index))
+    return bundles
 
 
 def find_agent(
@@ -199,6 +385,9 @@ def find_agent(
     items: list[ScheduleItem],
     current_item_index: int,
     last_item_index: int,
+    owned_items: list[set[int]] | None = None,
+    item_owners: list[set[int]] | None = None,
+    willing_owners: dict[tuple[int, int], int] | None = None,
 ):
     """Find agent willing to do the exchange.
 
@@ -211,14 +400,26 @@ def find_agent(
         items (list[ScheduleItem]): List of items from class BaseItem
         current_item_index (int): index of the item that we want to exchange
         last_item_index (int): index of the item that we want to exchange current item for
+        owned_items (list[set[int]], optional): indices of the items owned by each agent
+        item_owners (list[set[int]], optional): indices of the agents owning each item
+        willing_owners (dict[tuple[int, int], int], optional): index of the agent last found willing to do each exchange
 
     Returns:
         item: index of the agent williing to do the exchange
     """
-    owners = get_owners_list(X, current_item_index)
+    if willing_owners is not None:
+        # the hint may be stale, so it is checked against the current bundle first
+        hint = willing_owners.get((current_item_index, last_item_index))
+        if hint is not None and agents[hint].exchange_contribution(
+            get_bundle_from_allocation_matrix(X, items, hint, owned_items),
+            items[current_item_index],
+            items[last_item_index],
+        ):
+            return hint
+    owners = get_owners_list(X, current_item_index, item_owners)
     for owner in owners:
         agent = agents[owner]
-        bundle = get_bundle_from_allocation_matrix(X, items, owner)
+        bundle = get_bundle_from_allocation_matrix(X, items, owner, owned_items)
         if agent.exchange_contribution(
             bundle, items[current_item_index], items[last_item_index]
         ):
@@ -237,6 +438,9 @@ def update_allocation(
     items: list[ScheduleItem],
     path_og: list[int],
     agent_picked: int,
+    owned_items: list[set[int]] | None = None,
+    item_owners: list[set[int]] | None = None,
+    willing_owners: dict[tuple[int, int], int] | None = None,
 ):
     """Update allocation matrix.
 
@@ -248,116 +452,147 @@ def update_allocation(
         items (list[ScheduleItem]): List of items from class BaseItem
         path_og (list[int]): shortest path, list of items indices
         agent_picked (int): index of the agent currently playing
+        owned_items (list[set[int]], optional): indices of the items owned by each agent, updated in place
+        item_owners (list[set[int]], optional): indices of the agents owning each item, updated in place
+        willing_owners (dict[tuple[int, int], int], optional): index of the agent last found willing to do each exchange
 
     Returns:
         X (type[np.ndarray]): updated allocation matrix
         agents_involved (list[int]): indices of the agents involved in the transfer path
     """
-    path = path_og.copy()
-    path = path[1:-1]
-    last_item = path[-1]
-    agents_involved = [agent_picked]
-    X[last_item, len(agents)] -= 1
-    while len(path) > 0:
-        last_item = path.pop(len(path) - 1)
-        # print('last item: ', last_item)
-        if len(path) > 0:
-            next_to_last_item = path[-1]
-            current_agent = find_agent(X, agents, items, next_to_last_item, last_item)
-            agents_involved.append(current_agent)
-            X[last_item, current_agent] = 1
-            X[next_to_last_item, current_agent] = 0
-        else:
-            X[last_item, agent_picked] = 1
+    # one agent per item in the path (between "s" and "t"), the picked agent first
+    agents_involved = [agent_picked] * (len(path_og) - 2)
+    X[path_og[-2], len(agents)] -= 1
+    # walk the items of the path (between "s" and "t") backwards
+    for idx in range(len(path_og) - 2, 1, -1):
+        last_item = path_og[idx]
+        next_to_last_item = path_og[idx - 1]
+        current_agent = find_agent(
+            X,
+            agents,
+            items,
+            next_to_last_item,
+            last_item,
+            owned_items,
+            item_owners,
+            willing_owners,
+        )
+        agents_involved[len(path_og) - 1 - idx] = current_agent
+        transfer_item(X, last_item, current_agent, True, owned_items, item_owners)
+        transfer_item(
+            X, next_to_last_item, current_agent, False, owned_items, item_owners
+        )
+    transfer_item(X, path_og[1], agent_picked, True, owned_items, item_owners)
 
     return X, agents_involved
 
 
 def update_allocation_E(
     X: type[np.ndarray],
-    G: type[nx.Graph],
-    E: list[list],
+    G: dict[int | str, dict[int | str, None]],
+    E: list[dict[int, list[int]]],
     agents: list[BaseAgent],
     items: list[ScheduleItem],
     path_og: list[int],
     agent_picked: int,
+    owned_items: list[set[int]] | None = None,
+    item_owners: list[set[int]] | None = None,
 ):
     """Udate allocation matrix, edge matrix, and exchange graph.
 
     Execute the transfer path found, updating the allocation of items and edge matrix accordingly.
-    Edge matrix is a list of lists containing the indices of agents responsible for each edge on the exchange graph
+    Edge matrix is a list of dicts containing the indices of agents responsible for each edge on the exchange graph
     This function is for the edge_matrix version of yankee swap
 
     Args:
         X (type[np.ndarray]): allocation matrix
-        G (type[nx.Graph]): exchange graph
-        E (list[list]): edge matrix
+        G (dict[int | str, dict[int | str, None]]): exchange graph
+        E (list[dict[int, list[int]]]): edge matrix
         agents (list[BaseAgent]): List of agents from class BaseAgent
         items (list[ScheduleItem]): List of items from class BaseItem
         path_og (list[int]): shortest path, list of items indices
         agent_picked (int): index of the agent currently playing
+        owned_items (list[set[int]], optional): indices of the items owned by each agent, updated in place
+        item_owners (list[set[int]], optional): indices of the agents owning each item, updated in place
 
     Returns:
         X (type[np.ndarray]): updated allocation matrix
-        G (type[nx.Graph]): updated exchange graph
-        E (list[list]): updated edge matrix
+        G (dict[int | str, dict[int | str, None]]): updated exchange graph
+        E (list[dict[int, list[int]]]): updated edge matrix
         agents_involved (list[int]): indices of the agents involved in the transfer path
     """
-    path = path_og.copy()
-    path = path[1:-1]
-    last_item = path[-1]
-    agents_involved = [agent_picked]
-    X[last_item, len(agents)] -= 1
-    while len(path) > 0:
-        last_item = path.pop(len(path) - 1)
-        if len(path) > 0:
-            next_to_last_item = path[-1]
-            current_agent = E[next_to_last_item][last_item][0]
-            agents_involved.append(current_agent)
-            X[last_item, current_agent] = 1
-            X[next_to_last_item, current_agent] = 0
-            for item_index in range(len(items)):
-                if current_agent in E[next_to_last_item][item_index]:
-                    E[next_to_last_item][item_index].remove(current_agent)
-                    if len(E[next_to_last_item][item_index]) == 0 and G.has_edge(
-                        next_to_last_item, item_index
-                    ):
-                        G.remove_edge(next_to_last_item, item_index)
-        else:
-            X[last_item, agent_picked] = 1
+    # one agent per item in the path (between "s" and "t"), the picked agent first
+    agents_involved = [agent_picked] * (len(path_og) - 2)
+    edges_to_remove = []
+    X[path_og[-2], len(agents)] -= 1
+    # walk the items of the path (between "s" and "t") backwards
+    for idx in range(len(path_og) - 2, 1, -1):
+        last_item = path_og[idx]
+        next_to_last_item = path_og[idx - 1]
+        current_agent = E[next_to_last_item][last_item][0]
+        agents_involved[len(path_og) - 1 - idx] = current_agent
+        transfer_item(X, last_item, current_agent, True, owned_items, item_owners)
+        transfer_item(
+            X, next_to_last_item, current_agent, False, owned_items, item_owners
+        )
+        row = E[next_to_last_item]
+        for item_index in [j for j, owners in row.items() if current_agent in owners]:
+            row[item_index].remove(current_agent)
+            if len(row[item_index]) == 0:
+                del row[item_index]
+                edges_to_remove.append((next_to_last_item, item_index))
+    transfer_item(X, path_og[1], agent_picked, True, owned_items, item_owners)
+    for u, v in edges_to_remove:
+        G[u].pop(v, None)
     return X, G, E, agents_involved
 
 
 """Graph functions for the exchange graph"""
 
 
-def find_shortest_path(G: type[nx.Graph], start: str, end: str):
+def find_shortest_path(G: dict[int | str, dict[int | str, None]], start: str, end: str):
     """Find shortest path on exchange graph.
 
-    Find and return shortest path from start to end nodes on graph G. Return False if there is no path
+    Find and return shortest path from start to end nodes on graph G. Return None if there is no path.
+    The graph is unweighted, so this is a breadth first search.
 
     Args:
-        G (type[nx.Graph]): exchange graph
+        G (dict[int | str, dict[int | str, None]]): exchange graph
         start (str): start node
         end (str): target node
 
     Returns:
         list[int]: list of nodes (item indices) on the shortest path
-        of False: if there is no such path
+        None: if there is no such path
     """
-    try:
-        p = nx.shortest_path(G, source=start, target=end)
-        return p
-    except:
-        return False
+    if start == end:
+        return [start]
+
+    parents = {start: None}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for neighbor in G[node]:
+            if neighbor in parents:
+                continue
+            parents[neighbor] = node
+            if neighbor == end:
+                path = [end]
+                while parents[path[-1]] is not None:
+                    path.append(parents[path[-1]])
+                return path[::-1]
+            queue.append(neighbor)
+    return None
 
 
 def add_agent_to_exchange_graph(
     X: type[np.ndarray],
-    G: type[nx.Graph],
+    G: dict[int | str, dict[int | str, None]],
     agents: list[BaseAgent],
     items: list[ScheduleItem],
     agent_picked: int,
+    owned_items: list[set[int]] | None = None,
+    desired_items: list[list[int]] | None = None,
 ):
     """Add picked agent to the exchange graph.
 
@@ -365,34 +600,40 @@ def add_agent_to_exchange_graph(
 
     Args:
         X (type[np.ndarray]): allocation matrix
-        G (type[nx.Graph]): exchange graph
+        G (dict[int | str, dict[int | str, None]]): exchange graph
         agents (list[BaseAgent]): List of agents from class BaseAgent
         items (list[ScheduleItem]): List of items from class BaseItem
         agent_picked (int): index of the agent currently playing
+        owned_items (list[set[int]], optional): indices of the items owned by each agent
+        desired_items (list[list[int]], optional): indices of the items desired by each agent
 
     Returns:
-        G (type[nx.Graph]): Updated exchange graph
+        G (dict[int | str, dict[int | str, None]]): Updated exchange graph
     """
-    G.add_node("s")
-    bundle = get_bundle_from_allocation_matrix(X, items, agent_picked)
+    G["s"] = {}
+    bundle = get_bundle_from_allocation_matrix(X, items, agent_picked, owned_items)
     agent = agents[agent_picked]
-    for i in agent.get_desired_items_indexes(items):
-        g = items[i]
-        if (
-            g not in bundle
-            and agents[agent_picked].marginal_contribution(bundle, g) == 1
-        ):
-            G.add_edge("s", i)
+    candidates = [
+        i
+        for i in get_desired_items(agents, items, agent_picked, desired_items)
+        if items[i] not in bundle
+    ]
+    gains = _marginal_contributions(agent, bundle, [items[i] for i in candidates])
+    G["s"].update((i, None) for i, gain in zip(candidates, gains) if gain == 1)
     return G
 
 
 def update_exchange_graph(
     X: type[np.ndarray],
-    G: type[nx.Graph],
+    G: dict[int | str, dict[int | str, None]],
     agents: list[BaseAgent],
     items: list[ScheduleItem],
     path_og: list[int],
     agents_involved: list[int],
+    owned_items: list[set[int]] | None = None,
+    item_owners: list[set[int]] | None = None,
+    desired_items: list[list[int]] | None = None,
+    willing_owners: dict[tuple[int, int], int] | None = None,
 ):
     """Update the exchange graph after the transfers made.
 
@@ -400,66 +641,88 @@ def update_exchange_graph(
 
     Args:
         X (type[np.ndarray]): allocation matrix
-        G (type[nx.Graph]): exchange graph
+        G (dict[int | str, dict[int | str, None]]): exchange graph
         agents (list[BaseAgent]): List of agents from class BaseAgent
         items (list[ScheduleItem]): List of items from class BaseItem
         path_og (list[int]): shortest path, list of items indices
         agents_involved (list[int]): list of the indices of the agents invovled in the transfer path
+        owned_items (list[set[int]], optional): indices of the items owned by each agent
+        item_owners (list[set[int]], optional): indices of the agents owning each item
+        desired_items (list[list[int]], optional): indices of the items desired by each agent
+        willing_owners (dict[tuple[int, int], int], optional): index of the agent last found willing to do each exchange, updated in place
 
     Returns:
-        G (type[nx.Graph]): updated exchange graph
+        G (dict[int | str, dict[int | str, None]]): updated exchange graph
     """
-    path = path_og.copy()
-    path = path[1:-1]
-    last_item = path[-1]
+    last_item = path_og[-2]
     if X[last_item, len(agents)] == 0:
-        G.remove_edge(last_item, "t")
+        del G[last_item]["t"]
+    edges_to_add = []
+    edges_to_remove = []
     agents_involved_desired_items = get_multiple_agents_desired_items(
-        agents, items, agents_involved
+        agents, items, agents_involved, desired_items
+    )
+    agents_involved_bundles = get_multiple_agents_bundles(
+        X, agents_involved, owned_items
     )
-    agents_involved_bundles = get_multiple_agents_bundles(X, agents_involved)
+    # items with the same owners share their candidates, so each union is built once
+    candidates_by_owners = {}
     for item_idx in agents_involved_bundles:
         item_1 = items[item_idx]
-        owners = list(get_owners_list(X, item_idx))
-        if len(agents) in owners:
-            owners.remove(len(agents))
-        owners_desired_items = get_multiple_agents_desired_items(agents, items, owners)
-        items_to_loop_over = list(
-            set(agents_involved_desired_items + owners_desired_items)
-        )
+        owners = list(get_owners_list(X, item_idx, item_owners))
+        key = tuple(owners)
+        if key not in candidates_by_owners:
+            candidates_by_owners[key] = list(
+                agents_involved_desired_items
+                | get_multiple_agents_desired_items(
+                    agents, items, owners, desired_items
+                )
+            )
+        items_to_loop_over = [
+            idx for idx in candidates_by_owners[key] if idx != item_idx
+        ]
+        # each owner is only asked about the items no earlier owner would exchange for
+        exchangeable = set()
+        for owner in owners:
+            pending = [idx for idx in items_to_loop_over if idx not in exchangeable]
+            if len(pending) == 0:
+                break
+            bundle_owner = get_bundle_from_allocation_matrix(
+                X, items, owner, owned_items
+            )
+            willing_owner = _exchange_contributions(
+                agents[owner], bundle_owner, item_1, [items[idx] for idx in pending]
+            )
+            for idx, w in zip(pending, willing_owner):
+                if w:
+                    exchangeable.add(idx)
+                    if willing_owners is not None:
+                        willing_owners[(item_idx, idx)] = owner
         for item_2_idx in items_to_loop_over:
-            if item_2_idx != item_idx:
-                item_2 = items[item_2_idx]
-                exchangeable = False
-                for owner in owners:
-                    if owner != len(agents):
-                        agent = agents[owner]
-                        bundle_owner = get_bundle_from_allocation_matrix(
-                            X, items, owner
-                        )
-                        willing_owner = agent.exchange_contribution(
-                            bundle_owner, item_1, item_2
-                        )
-                        if willing_owner:
-                            exchangeable = True
-                            break
-                if exchangeable:
-                    if not G.has_edge(item_idx, item_2_idx):
-                        G.add_edge(item_idx, item_2_idx)
-                else:
-                    if G.has_edge(item_idx, item_2_idx):
-                        G.remove_edge(item_idx, item_2_idx)
+            if item_2_idx in exchangeable:
+                if item_2_idx not in G[item_idx]:
+                    edges_to_add.append((item_idx, item_2_idx))
+            else:
+                if item_2_idx in G[item_idx]:
+                    edges_to_remove.append((item_idx, item_2_idx))
+    # every pair is visited once, so the batches never overlap
+    for u, v in edges_to_remove:
+        G[u].pop(v, None)
+    for u, v in edges_to_add:
+        G[u][v] = None
     return G
 
 
 def update_exchange_graph_E(
     X: type[np.ndarray],
-    G: type[nx.Graph],
-    E: list[list],
+    G: dict[int | str, dict[int | str, None]],
+    E: list[dict[int, list[int]]],
     agents: list[BaseAgent],
     items: list[ScheduleItem],
     path_og: list[int],
     agents_involved: list[int],
+    owned_items: list[set[int]] | None = None,
+    desired_items: list[list[int]] | None = None,
 ):
     """Update the exchange graph and edge matrix after the transfers made.
 
@@ -468,48 +731,62 @@ def update_exchange_graph_E(
 
     Args:
         X (type[np.ndarray]): allocation matrix
-        G (type[nx.Graph]): exchange graph
-        E (list[list]): edge matrix
+        G (dict[int | str, dict[int | str, None]]): exchange graph
+        E (list[dict[int, list[int]]]): edge matrix
         agents (list[BaseAgent]): List of agents from class BaseAgent
         items (list[ScheduleItem]): List of items from class BaseItem
         path_og (list[int]): shortest path, list of items indices
         agents_involved (list[int]): list of the indices of the agents invovled in the transfer path
+        owned_items (list[set[int]], optional): indices of the items owned by each agent
+        desired_items (list[list[int]], optional): indices of the items desired by each agent
 
     Returns:
-        G (type[nx.Graph]): updated exchange graph
-        E (list[list]): updated edge matrix
+        G (dict[int | str, dict[int | str, None]]): updated exchange graph
+        E (list[dict[int, list[int]]]): updated edge matrix
     """
-    path = path_og.copy()
-    path = path[1:-1]
-    last_item = path[-1]
+    last_item = path_og[-2]
     if X[last_item, len(agents)] == 0:
-        G.remove_edge(last_item, "t")
-    for agent_index in agents_involved:
+        del G[last_item]["t"]
+    # item to item edges exist exactly when their edge matrix entry is not empty
+    edges_to_add = []
+    edges_to_remove = []
+    # an agent may be responsible for several transfers on the path, but its edges only
+    # depend on its final bundle, so each agent is updated once
+    for agent_index in dict.fromkeys(agents_involved):
         agent = agents[agent_index]
-        agent_bundle = get_bundle_indexes_from_allocation_matrix(X, agent_index)
-        agent_bundle_items = get_bundle_from_allocation_matrix(X, items, agent_index)
-        agent_desired_items = agent.get_desired_items_indexes(items)
+        agent_bundle = get_bundle_indexes_from_allocation_matrix(
+            X, agent_index, owned_items
+        )
+        agent_bundle_items = [items[i] for i in agent_bundle]
+        agent_desired_items = get_desired_items(
+            agents, items, agent_index, desired_items
+        )
         for item1_idx in agent_bundle:
             item1 = items[item1_idx]
-            for item2_idx in agent_desired_items:
-                item2 = items[item2_idx]
+            willing = _exchange_contributions(
+                agent,
+                agent_bundle_items,
+                item1,
+                [items[j] for j in agent_desired_items],
+            )
+            for item2_idx, exchangeable in zip(agent_desired_items, willing):
                 if item1_idx != item2_idx:
-                    if agent_index in E[item1_idx][item2_idx]:
-                        if not agent.exchange_contribution(
-                            agent_bundle_items, item1, item2
-                        ):
-                            E[item1_idx][item2_idx].remove(agent_index)
-                            if len(E[item1_idx][item2_idx]) == 0 and G.has_edge(
-                                item1_idx, item2_idx
-                            ):
-                                G.remove_edge(item1_idx, item2_idx)
+                    row = E[item1_idx]
+                    if agent_index in row.get(item2_idx, ()):
+                        if not exchangeable:
+                            row[item2_idx].remove(agent_index)
+                            if len(row[item2_idx]) == 0:
+                                del row[item2_idx]
+                                edges_to_remove.append((item1_idx, item2_idx))
                     else:
-                        if agent.exchange_contribution(
-                            agent_bundle_items, item1, item2
-                        ):
-                            E[item1_idx][item2_idx].append(agent_index)
-                            if not G.has_edge(item1_idx, item2_idx):
-                                G.add_edge(item1_idx, item2_idx)
+                        if exchangeable:
+                            if item2_idx not in row:
+                                edges_to_add.append((item1_idx, item2_idx))
+                            row.setdefault(item2_idx, []).append(agent_index)
+    for u, v in edges_to_remove:
+        G[u].pop(v, None)
+    for u, v in edges_to_add:
+        G[u][v] = None
     return G, E
 
 
@@ -560,20 +837,24 @@ def round_robin(agents: list[BaseAgent], items: list[ScheduleItem]):
     """
     players = list(range(len(agents)))
     X = initialize_allocation_matrix(items, agents)
+    desired_items = [agent.get_desired_items_indexes(items) for agent in agents]
     while len(players) > 0:
         for player in players:
             val = 0
             current_item = []
             agent = agents[player]
-            desired_items = agent.get_desired_items_indexes(items)
             bundle = get_bundle_from_allocation_matrix(X, items, player)
-            for item in desired_items:
-                if X[item, len(agents)] > 0:
-                    current_val = agent.marginal_contribution(bundle, items[item])
-                    if current_val > val:
-                        current_item.clear()
-                        current_item.append(item)
-                        val = current_val
+            available = [
+                item for item in desired_items[player] if X[item, len(agents)] > 0
+            ]
+            gains = _marginal_contributions(
+                agent, bundle, [items[item] for item in available]
+            )
+            for item, current_val in zip(available, gains):
+                if current_val > val:
+                    current_item.clear()
+                    current_item.append(item)
+                    val = current_val
             if len(current_item) > 0:
                 X[current_item[0], player] = 1
                 X[current_item[0], len(agents)] -= 1
@@ -599,6 +880,7 @@ def round_robin_weights(
     """
     players = list(range(len(agents)))
     X = initialize_allocation_matrix(items, agents)
+    desired_items = [agent.get_desired_items_indexes(items) for agent in agents]
     weights_aux = weights.copy()
     while len(players) > 0:
         weight = weights_aux[0]
@@ -607,15 +889,16 @@ def round_robin_weights(
                 val = 0
                 current_item = []
                 agent = agents[player]
-                desired_items = agent.get_desired_items_indexes(items)
                 bundle = get_bundle_from_allocation_matrix(X, items, player)
-                for item in desired_items:
-                    if X[item, 0] > 0:
-                        current_val = agent.marginal_contribution(bundle, items[item])
-                        if current_val > val:
-                            current_item.clear()
-                            current_item.append(item)
-                            val = current_val
+                available = [item for item in desired_items[player] if X[item, 0] > 0]
+                gains = _marginal_contributions(
+                    agent, bundle, [items[item] for item in available]
+                )
+                for item, current_val in zip(available, gains):
+                    if current_val > val:
+                        current_item.clear()
+                        current_item.append(item)
+                        val = current_val
                 if len(current_item) > 0:
                     X[current_item[0], player] = 1
                     X[current_item[0], 0] -= 1
@@ -631,6 +914,8 @@ def general_yankee_swap(
     criteria: str = "LorenzDominance",
     weights: list[float] = [],
     plot_exchange_graph: bool = False,
+    verbose: bool = False,
+    on_iter: Callable | None = None,
 ):
     """General Yankee swap allocation algorithm.
 
@@ -640,6 +925,8 @@ def general_yankee_swap(
         criteria (str, optional): gain function criteria. Defaults to "LorenzDominance". See get_gain_function to see other alternatives
         weights (list[float]): list of agents assigned weights
         plot_exchange_graph (bool, optional): Defaults to False. Change to True to display exchange graph plot after every modification to it.
+        verbose (bool, optional): Defaults to False. Change to True to print the iteration count as the algorithm runs.
+        on_iter (collections.abc.Callable, optional): Called as on_iter(G, iteration) after every modification to the exchange graph. Takes precedence over plot_exchange_graph.
 
     Returns:
         X (type[np.ndarray]): allocation matrix
@@ -650,38 +937,78 @@ def general_yankee_swap(
     M = len(agents)
     players = list(range(M))
     X = initialize_allocation_matrix(items, agents)
+    owned_items, item_owners = initialize_ownership(X, M)
+    desired_items = [agent.get_desired_items_indexes(items) for agent in agents]
+    willing_owners = {}
+    # a transfer path leaves every utility unchanged except the picked agent's, which
+    # grows by exactly one, so utilities are tracked rather than revalued
+    utilities = [0] * M
     G = initialize_exchange_graph(N)
     gain_vector = np.zeros([M])
+    # active players keyed by negated gain, so ties go to the lowest index as with argmax
+    gain_heap = [(0.0, i) for i in players]
+    if on_iter is None and plot_exchange_graph:
+        on_iter = _draw_on_iter
     count = 0
     time_steps = []
     agents_involved_arr = []
     start = time.process_time()
     while len(players) > 0:
-        print("Iteration: %d" % count, end="\r")
+        if verbose:
+            print("Iteration: %d" % count, end="\r")
         count += 1
-        agent_picked = np.argmax(gain_vector)
-        G = add_agent_to_exchange_graph(X, G, agents, items, agent_picked)
-        if plot_exchange_graph:
-            nx.draw(G, with_labels=True)
-            plt.show()
+        _, agent_picked = heapq.heappop(gain_heap)
+        G = add_agent_to_exchange_graph(
+            X, G, agents, items, agent_picked, owned_items, desired_items
+        )
+        if on_iter is not None:
+            on_iter(G, count - 1)
 
         path = find_shortest_path(G, "s", "t")
-        G.remove_node("s")
+        del G["s"]
 
-        if path == False:
+        if path is None:
             players.remove(agent_picked)
             gain_vector[agent_picked] = float("-inf")
             time_steps.append(time.process_time() - start)
             agents_involved_arr.append(0)
         else:
-            X, agents_involved = update_allocation(X, agents, items, path, agent_picked)
-            G = update_exchange_graph(X, G, agents, items, path, agents_involved)
+            X, agents_involved = update_allocation(
+                X,
+                agents,
+                items,
+                path,
+                agent_picked,
+                owned_items,
+                item_owners,
+                willing_owners,
+            )
+            G = update_exchange_graph(
+                X,
+                G,
+                agents,
+                items,
+                path,
+                agents_involved,
+                owned_items,
+                item_owners,
+                desired_items,
+                willing_owners,
+            )
+            utilities[agent_picked] += 1
             gain_vector[agent_picked] = get_gain_function(
-                X, agents, items, agent_picked, criteria, weights
+                X,
+                agents,
+                items,
+                agent_picked,
+                criteria,
+                weights,
+                owned_items,
+                utilities[agent_picked],
             )
-            if plot_exchange_graph:
-                nx.draw(G, with_labels=True)
-                plt.show()
+            heapq.heappush(gain_heap, (-gain_vector[agent_picked], agent_picked))
+            if on_iter is not None:
+                on_iter(G, count - 1)
             time_steps.append(time.process_time() - start)
             agents_involved_arr.append(len(agents_involved))
     return X, time_steps, agents_involved_arr
@@ -693,6 +1020,8 @@ def general_yankee_swap_E(
     criteria: str = "LorenzDominance",
     weights: list = [],
     plot_exchange_graph: bool = False,
+    verbose: bool = False,
+    on_iter: Callable | None = None,
 ):
     """General Yankee swap allocation algorithm, edge matrix version.
 
@@ -704,6 +1033,8 @@ def general_yankee_swap_E(
         criteria (str, optional): gain function criteria. Defaults to "LorenzDominance". See get_gain_function to see other alternatives
         weights (list[float]): list of agents assigned weights
         plot_exchange_graph (bool, optional): Defaults to False. Change to True to display exchange graph plot after every modification to it.
+        verbose (bool, optional): Defaults to False. Change to True to print the iteration count as the algorithm runs.
+        on_iter (collections.abc.Callable, optional): Called as on_iter(G, iteration) after every modification to the exchange graph. Takes precedence over plot_exchange_graph.
 
     Returns:
         X (type[np.ndarray]): allocation matrix
@@ -714,43 +1045,70 @@ def general_yankee_swap_E(
     M = len(agents)
     players = list(range(M))
     X = initialize_allocation_matrix(items, agents)
+    owned_items, item_owners = initialize_ownership(X, M)
+    desired_items = [agent.get_desired_items_indexes(items) for agent in agents]
+    # a transfer path leaves every utility unchanged except the picked agent's, which
+    # grows by exactly one, so utilities are tracked rather than revalued
+    utilities = [0] * M
     G = initialize_exchange_graph(N)
-    E = [[[] for i in range(N)] for j in range(N)]
+    E = initialize_edge_matrix(N)
     gain_vector = np.zeros([M])
+    # active players keyed by negated gain, so ties go to the lowest index as with argmax
+    gain_heap = [(0.0, i) for i in players]
+    if on_iter is None and plot_exchange_graph:
+        on_iter = _draw_on_iter
     count = 0
     time_steps = []
     agents_involved_arr = []
     start = time.process_time()
     while len(players) > 0:
-        print("Iteration: %d" % count, end="\r")
+        if verbose:
+            print("Iteration: %d" % count, end="\r")
         count += 1
-        agent_picked = np.argmax(gain_vector)
-        G = add_agent_to_exchange_graph(X, G, agents, items, agent_picked)
-        if plot_exchange_graph:
-            nx.draw(G, with_labels=True)
-            plt.show()
+        _, agent_picked = heapq.heappop(gain_heap)
+        G = add_agent_to_exchange_graph(
+            X, G, agents, items, agent_picked, owned_items, desired_items
+        )
+        if on_iter is not None:
+            on_iter(G, count - 1)
 
         path = find_shortest_path(G, "s", "t")
-        G.remove_node("s")
+        del G["s"]
 
-        if path == False:
+        if path is None:
             players.remove(agent_picked)
             gain_vector[agent_picked] = float("-inf")
             time_steps.append(time.process_time() - start)
             agents_involved_arr.append(0)
         else:
             X, G, E, agents_involved = update_allocation_E(
-                X, G, E, agents, items, path, agent_picked
+                X, G, E, agents, items, path, agent_picked, owned_items, item_owners
             )
             G, E = update_exchange_graph_E(
-                X, G, E, agents, items, path, agents_involved
+                X,
+                G,
+                E,
+                agents,
+                items,
+                path,
+                agents_involved,
+                owned_items,
+                desired_items,
             )
+            utilities[agent_picked] += 1
             gain_vector[agent_picked] = get_gain_function(
-                X, agents, items, agent_picked, criteria, weights
+                X,
+                agents,
+                items,
+                agent_picked,
+                criteria,
+                weights,
+                owned_items,
+                utilities[agent_picked],
             )
-            if plot_exchange_graph:
-                nx.draw(G, with_labels=True)
-                plt.show()
+            heapq.heappush(gain_heap, (-gain_vector[agent_picked], agent_picked))
+            if on_iter is not None:
+                on_iter(G, count - 1)
             time_steps.append(time.process_time() - start)
             agents_involved_arr.append(len(agents_involved))
     return X, time_steps, agents_involved_arr
@@ -3,7 +3,7 @@ from typing import Any, List, Union
 
 import numpy as np
 import scipy
-from scipy.sparse import dok_array
+from scipy.sparse import csc_array, csr_array, dok_array
 
 from .feature import BaseFeature, Slot, Weekday
 from .item import BaseItem, ScheduleItem
@@ -21,23 +21,76 @@ def indicator(bundle: List[BaseItem], extent: int, sparse: bool):
         sparse (bool): Should the vector returned be sparse
 
     Returns:
-        scipy.sparse.dok_array: Indicator vector of bundle indices
+        Union[scipy.sparse.csr_array, np.ndarray]: Indicator vector of bundle indices
     """
-    rows = extent
+    # an item may appear more than once in the bundle, but is only indicated once
+    idxs = np.unique(
+        np.fromiter((item.index for item in bundle), dtype=np.intp, count=len(bundle))
+    )
     if sparse:
-        ind = dok_array((rows, 1), dtype=np.int_)
-    else:
-        ind = np.zeros((rows, 1), dtype=np.int_)
-
-    for item in bundle:
-        ind[item.index, 0] = True
+        return csr_array(
+            (np.ones(len(idxs), dtype=np.int_), (idxs, np.zeros_like(idxs))),
+            shape=(extent, 1),
+        )
 
-    if sparse:
-        ind = ind.tocsr()
+    # A is stored as int8, so A @ ind would overflow if ind were int8 too
+    ind = np.zeros((extent, 1), dtype=np.int_)
+    ind[idxs, 0] = 1
 
     return ind
 
 
+def compute_extent(items: List[BaseItem]):
+    """Number of columns needed to index every item
+
+    Constraints built over the same items share this value, so it can be computed once
+    and passed to each of their helper methods
+
+    Args:
+        items (List[BaseItem]): Universe of all items under consideration
+
+    Returns:
+        int: One more than the largest item index
+    """
+    return max(item.index for item in items) + 1
+
+
+def _positions(values: List[Any]):
+    """Positions at which each value occurs
+
+    Args:
+        values (List[Any]): Hashable values, e.g. the domain of a feature
+
+    Returns:
+        Dict(Any, List[int]): Positions of each value in values
+    """
+    positions = defaultdict(list)
+    for i, value in enumerate(values):
+        positions[value].append(i)
+
+    return positions
+
+
+def _incidence_matrix(entries: set[tuple[int, int]], rows: int, cols: int):
+    """0/1 matrix with a 1 at each of the given entries
+
+    Args:
+        entries (set[tuple[int, int]]): Distinct (row, column) pairs set to 1
+        rows (int): Number of rows
+        cols (int): Number of columns
+
+    Returns:
+        scipy.sparse.csr_array: rows x cols incidence matrix
+    """
+    row_idxs = [i for i, _ in entries]
+    col_idxs = [j for _, j in entries]
+
+    return csr_array(
+        (np.ones(len(entries), dtype=np.int8), (row_idxs, col_idxs)),
+        shape=(rows, cols),
+    )
+
+
 class BaseConstraint:
     pass
 
@@ -70,6 +123,8 @@ class LinearConstraint(BaseConstraint):
             self._sparse = False
 
         self.extent = extent
+        self._A_csc = None
+        self._b_dense = None
 
     def to_sparse(self):
         """Convert constraint from dense to sparse matrix format
@@ -109,6 +164,92 @@ class LinearConstraint(BaseConstraint):
 
         return LinearConstraint(self.A.to_dense(), self.b.to_dense(), self.extent)
 
+    def _columns(self):
+        """Constraint matrix in a format suited to column slicing
+
+        Computed on first use, since only some callers slice columns.
+
+        Returns:
+            Union[scipy.sparse.csc_matrix, np.ndarray]: A in CSC format if sparse, as an array otherwise
+        """
+        if self._A_csc is None:
+            self._A_csc = self.A.tocsc() if self._sparse else np.asarray(self.A)
+        return self._A_csc
+
+    def _capacities(self):
+        """Row capacities as a dense vector, computed on first use
+
+        Returns:
+            np.ndarray: b flattened to one entry per row of A
+        """
+        if self._b_dense is None:
+            b = self.b.todense() if self._sparse else self.b
+            self._b_dense = np.asarray(b).ravel()
+        return self._b_dense
+
+    def product(self, bundle: List[BaseItem]):
+        """Constraint matrix applied to the bundle indicator vector
+
+        Args:
+            bundle (List[BaseItem]): Items in the bundle
+
+        Returns:
+            np.ndarray: A @ indicator(bundle), flattened to one entry per row of A
+        """
+        # only the columns of the items in the bundle are read, rather than multiplying
+        # all of A by an indicator vector that is mostly zeros
+        idxs = np.unique(
+            np.fromiter(
+                (item.index for item in bundle), dtype=np.intp, count=len(bundle)
+            )
+        )
+        return np.asarray(self._columns()[:, idxs].sum(axis=1)).ravel()
+
+    def delta_product(
+        self,
+        product: np.ndarray,
+        added_items: List[BaseItem] = [],
+        removed_items: List[BaseItem] = [],
+    ):
+        """Update a bundle product after adding and removing items
+
+        Only the columns of A for the items that changed are read. Added items must
+        not already be in the bundle, and removed items must be in it.
+
+        Args:
+            product (np.ndarray): Product of the original bundle, as returned by product
+            added_items (List[BaseItem], optional): Items added to the bundle
+            removed_items (List[BaseItem], optional): Items removed from the bundle
+
+        Returns:
+            np.ndarray: Product of the updated bundle
+        """
+        A = self._columns()
+        for items, sign in [(added_items, 1), (removed_items, -1)]:
+            if len(items) > 0:
+                cols = A[:, [item.index for item in items]].sum(axis=1)
+                product = product + sign * np.asarray(cols).ravel()
+        return product
+
+    def delta_satisfies(
+        self,
+        product: np.ndarray,
+        added_items: List[BaseItem] = [],
+        removed_items: List[BaseItem] = [],
+    ):
+        """Determine if a bundle still satisfies this constraint after a few items change
+
+        Args:
+            product (np.ndarray): Product of the original bundle, as returned by product
+            added_items (List[BaseItem], optional): Items added to the bundle
+            removed_items (List[BaseItem], optional): Items removed from the bundle
+
+        Returns:
+            bool: True if the updated bundle satisfies the constraint; False otherwise
+        """
+        product = self.delta_product(product, added_items, removed_items)
+        return bool(np.all(product <= self._capacities()))
+
     def satisfies(self, bundle: List[BaseItem]):
         """Determine if bundle satisfies this constraint
 
@@ -118,17 +259,48 @@ class LinearConstraint(BaseConstraint):
         Returns:
             bool: True if the constraint is satisfied; False otherwise
         """
-        ind = indicator(bundle, self.extent, self._sparse)
-        product = self.A @ ind
+        # A has few rows, so the product is compared densely in a single pass
+        return bool(np.all(self.product(bundle) <= self._capacities()))
 
-        # apparently <= is much less efficient than using < and != separately
-        if self._sparse:
-            less_than = (product < self.b).toarray().flatten()
-            equal_to = ~(product != self.b).toarray().flatten()
+    def satisfies_batch(self, bundles: List[List[BaseItem]]):
+        """Determine which of several bundles satisfy this constraint
+
+        The indicator vectors of all bundles are stacked as the columns of a single matrix,
+        so A is only multiplied once
+
+        Args:
+            bundles (List[List[BaseItem]]): Items in each bundle
+
+        Raises:
+            IndexError: Item indices must be smaller than extent
 
-            return np.prod([lt or eq for lt, eq in zip(less_than, equal_to)])
+        Returns:
+            np.ndarray: Boolean vector, True for every bundle that satisfies the constraint
+        """
+        idxs = [
+            np.unique(
+                np.fromiter(
+                    (item.index for item in bundle), dtype=np.intp, count=len(bundle)
+                )
+            )
+            for bundle in bundles
+        ]
+        indptr = np.cumsum([0] + [len(bundle_idxs) for bundle_idxs in idxs])
+        indices = np.concatenate([np.zeros(0, dtype=np.intp)] + idxs)
+        if len(indices) > 0 and indices.max() >= self.extent:
+            raise IndexError(f"item index {indices.max()} exceeds extent {self.extent}")
+
+        # entries are wider than A, so that the products cannot overflow int8
+        B = csc_array(
+            (np.ones(len(indices), dtype=np.int_), indices, indptr),
+            shape=(self.extent, len(bundles)),
+        )
+        if self._sparse:
+            P = (self.A @ B).toarray()
         else:
-            return np.prod(product <= self.b)
+            P = np.asarray(self.A @ B.toarray())
+
+        return np.all(P <= self._capacities()[:, None], axis=0)
 
     def constrained_items(self, items: BaseItem):
         """Determine if, and for what constraint, each item is constrained
@@ -139,11 +311,17 @@ class LinearConstraint(BaseConstraint):
         Returns:
             Dict(BaseItem, List[int]): List of constraints (rows of A) where each item is constrained
         """
+        A = self._columns()
         active_map = defaultdict(list)
-        for i in range(self.A.shape[0]):
-            for item in items:
-                if self.A[i, item.index] != 0:
-                    active_map[item].append(i)
+        for item in items:
+            # rows come straight from the column, in CSC format without any search
+            if self._sparse:
+                start, end = A.indptr[item.index], A.indptr[item.index + 1]
+                rows = np.sort(A.indices[start:end][A.data[start:end] != 0])
+            else:
+                rows = np.flatnonzero(A[:, item.index])
+            if len(rows) > 0:
+                active_map[item].extend(rows.tolist())
 
         return active_map
 
@@ -176,8 +354,13 @@ class LinearConstraint(BaseConstraint):
 
         extent = max(self.extent, other.extent)
         if self._sparse:
-            A = scipy.sparse.vstack([self.A, other.A])
-            b = scipy.sparse.vstack([self.b, other.b])
+            A = scipy.sparse.vstack([self.A, other.A], format="csr")
+            b = scipy.sparse.vstack([self.b, other.b], format="csr")
+
+            # products with A take the fast path only when it is in canonical form
+            for M in [A, b]:
+                M.sum_duplicates()
+                M.sort_indices()
         else:
             A = np.vstack([self.A, other.A])
             b = np.vstack([self.b, other.b])
@@ -193,6 +376,7 @@ class PreferenceConstraint(LinearConstraint):
         limits: List[int],
         preferred_features: List[BaseFeature],
         sparse: bool = False,
+        extent: int | None = None,
     ):
         """A helper method for constructing preference constraints
 
@@ -205,6 +389,7 @@ class PreferenceConstraint(LinearConstraint):
             limits (List[int]): The maximum number of items desired per category
             preferred_features (List[BaseFeature]): The feaures in terms of which preferred values are expressed
             sparse (bool): Should A and b be sparse matrices. Defaults to False.
+            extent (int | None, optional): Number of columns, as returned by compute_extent. Computed from the items if None. Defaults to None.
 
         Raises:
             IndexError: Number of categories must match among preferred_items and limits
@@ -216,23 +401,27 @@ class PreferenceConstraint(LinearConstraint):
             raise IndexError("item and limit lists must have the same length")
 
         rows = len(preferred_values)
-        cols = max([item.index for item in schedule]) + 1
-        A = dok_array((rows, cols), dtype=np.int_)
-        b = dok_array((rows, 1), dtype=np.int_)
+        cols = compute_extent(schedule) if extent is None else extent
 
+        # items are grouped by their preferred feature values once, instead of
+        # rescanning the schedule for every preferred value
+        indexes_by_values = defaultdict(list)
+        for item in schedule:
+            values = tuple(item.value(feature) for feature in preferred_features)
+            indexes_by_values[values].append(item.index)
+
+        entries = set()
         for i in range(rows):
             for values in preferred_values[i]:
-                for item in schedule:
-                    match = True
-                    for j, feature in enumerate(preferred_features):
-                        if item.value(feature) != values[j]:
-                            match = False
-                    if match:
-                        A[
-                            i,
-                            item.index,
-                        ] = 1
-            b[i, 0] = limits[i]
+                key = tuple(values[: len(preferred_features)])
+                entries.update((i, j) for j in indexes_by_values.get(key, []))
+
+        A = _incidence_matrix(entries, rows, cols)
+        # limits are stored narrowly unless they do not fit in int16
+        b = np.array(limits, dtype=np.int_).reshape(rows, 1)
+        if np.all(np.abs(b) <= np.iinfo(np.int16).max):
+            b = b.astype(np.int16)
+        b = csr_array(b)
 
         if not sparse:
             A = A.todense()
@@ -248,6 +437,7 @@ class CourseTimeConstraint(LinearConstraint):
         slot: Slot,
         weekday: Weekday,
         sparse: bool = False,
+        extent: int | None = None,
     ):
         """Helper method for creating constraints that prevent course time overlap
 
@@ -258,26 +448,27 @@ class CourseTimeConstraint(LinearConstraint):
             slot (Slot): Feature for time slots
             weekday (Weekday): Feature for weekdays
             sparse (bool): Should A and b be sparse matrices. Defaults to False.
+            extent (int | None, optional): Number of columns, as returned by compute_extent. Computed from the items if None. Defaults to None.
 
         Returns:
             CourseTimeConstraint: A: (time slots x features domain), b: (time slots x 1)
         """
         rows = len(weekday.days) * len(slot.times)
-        cols = max([item.index for item in items]) + 1
-        A = dok_array((rows, cols), dtype=np.int_)
-        b = dok_array((rows, 1), dtype=np.int_)
-
-        for i, wk in enumerate(weekday.days):
-            for j, tm in enumerate(slot.times):
-                idx = i * len(slot.times) + j
-                items_at_day_time = [
-                    item
-                    for item in items
-                    if wk in item.value(weekday) and tm in item.value(slot)
-                ]
-                for item in items_at_day_time:
-                    A[idx, item.index] = 1
-                b[idx, 0] = 1
+        cols = compute_extent(items) if extent is None else extent
+        day_positions = _positions(weekday.days)
+        time_positions = _positions(slot.times)
+
+        # each item only visits the rows for the days and times it meets at
+        entries = set()
+        for item in items:
+            for wk in set(item.value(weekday)):
+                for tm in set(item.value(slot)):
+                    for i in day_positions.get(wk, []):
+                        for j in time_positions.get(tm, []):
+                            entries.add((i * len(slot.times) + j, item.index))
+
+        A = _incidence_matrix(entries, rows, cols)
+        b = csr_array(np.ones((rows, 1), dtype=np.int16))
 
         if not sparse:
             A = A.todense()
@@ -292,6 +483,7 @@ class MutualExclusivityConstraint(LinearConstraint):
         items: List[ScheduleItem],
         exclusive_feature: BaseFeature,
         sparse: bool = False,
+        extent: int | None = None,
     ):
         """Helper method for creating constraints that prevent scheduling multiple sections of the same class
 
@@ -299,22 +491,23 @@ class MutualExclusivityConstraint(LinearConstraint):
             items (List[ScheduleItem]): Items, possibly having same value for exclusive_feature
             exclusive_feature (BaseFeature): Feature that must remain exclusive
             sparse (bool, optional): Should A and b be sparse matrices. Defaults to False.
+            extent (int | None, optional): Number of columns, as returned by compute_extent. Computed from the items if None. Defaults to None.
 
         Returns:
             MutualExclusivityConstraint: A: (exclusive_feature domain x features domain), b: (exclusive_feature domain x 1)
         """
         rows = len(exclusive_feature.domain)
-        cols = max([item.index for item in items]) + 1
-        A = dok_array((rows, cols), dtype=np.int_)
-        b = dok_array((rows, 1), dtype=np.int_)
-
-        for i, excl in enumerate(exclusive_feature.domain):
-            items_for_course = [
-                item for item in items if item.value(exclusive_feature) == excl
-            ]
-            for item in items_for_course:
-                A[i, item.index] = 1
-            b[i, 0] = 1
+        cols = compute_extent(items) if extent is None else extent
+        positions = _positions(exclusive_feature.domain)
+
+        # items are placed in the rows of their value in a single pass
+        entries = set()
+        for item in items:
+            for i in positions.get(item.value(exclusive_feature), []):
+                entries.add((i, item.index))
+
+        A = _incidence_matrix(entries, rows, cols)
+        b = csr_array(np.ones((rows, 1), dtype=np.int16))
 
         if not sparse:
             A = A.todense()
@@ -1,10 +1,51 @@
 import numpy as np
 
 from .agent import BaseAgent
-from .metrics import precompute_bundles_valuations
+from .metrics import (
+    _bundles_from_allocation,
+    _count_violations,
+    precompute_bundles_valuations,
+)
 from .item import ScheduleItem
 
 
+def envy_matrix(valuations: type[np.ndarray]):
+    """Pairwise envy between agents
+
+    Element i,j is True if agent i values agent j's bundle more than their own.
+    The diagonal is always False.
+
+    Args:
+        valuations (type[np.ndarray]): Valuations of all agents for all bundles under X
+
+    Returns:
+        np.ndarray: len(agents) x len(agents) boolean matrix
+    """
+    own = np.diag(valuations)
+    return own[:, None] < valuations
+
+
+def _item_contributions(agent: BaseAgent, bundle: list[ScheduleItem], value):
+    """Value lost by removing each item of a bundle, for agents with or without item_contributions
+
+    Args:
+        agent (BaseAgent): Agent whose valuation is used
+        bundle (list[ScheduleItem]): Set of items
+        value (Any): Agent's value for the whole bundle
+
+    Returns:
+        list[Any]: Value lost by removing every item, one at a time, in bundle order
+    """
+    item_contributions = getattr(agent, "item_contributions", None)
+    if item_contributions is None:
+        return [
+            value - agent.valuation(bundle[:i] + bundle[i + 1 :])
+            for i in range(len(bundle))
+        ]
+
+    return item_contributions(bundle)
+
+
 def EF_violations(
     X: type[np.ndarray],
     agents: list[BaseAgent],
@@ -29,19 +70,11 @@ def EF_violations(
         int: number of envious agents
     """
 
-    num_agents = len(agents)
-    EF_matrix = np.zeros((num_agents, num_agents))
-
     if valuations is None:
         _, valuations = precompute_bundles_valuations(X, agents, items)
 
-    for i in range(len(agents)):
-        for j in range(i + 1, len(agents)):
-            if valuations[i, i] < valuations[i, j]:
-                EF_matrix[i, j] = 1
-            if valuations[j, j] < valuations[j, i]:
-                EF_matrix[j, i] = 1
-    return np.sum(EF_matrix > 0), np.sum(np.any(EF_matrix > 0, axis=1))
+    EF_matrix = envy_matrix(valuations)
+    return np.sum(EF_matrix), np.sum(np.any(EF_matrix, axis=1))
 
 
 def EF1_violations(
@@ -50,6 +83,7 @@ def EF1_violations(
     items: list[ScheduleItem],
     bundles: list[list[ScheduleItem]] | None = None,
     valuations: type[np.ndarray] | None = None,
+    count_pairs: bool = True,
 ):
     """Compute envy-free up to one item (EF-1) violations.
 
@@ -64,35 +98,30 @@ def EF1_violations(
         schedule (list[ScheduleItem]): Items from class BaseItem
         bundles (list(list[ScheduleItem])): List of all agents bundles
         valuations (type[np.ndarray]): Valuations of all agents for all bundles under X
+        count_pairs (bool): If False, stop checking an agent after their first violation
 
     Returns:
-        int: number of EF-1 violations
+        int | None: number of EF-1 violations, None if count_pairs is False
         int: number of envious agents in the EF-1 sense
     """
 
     if valuations is None:
         bundles, valuations = precompute_bundles_valuations(X, agents, items)
-
-    num_agents = len(agents)
-    EF1_matrix = np.zeros((num_agents, num_agents))
+    elif bundles is None:
+        bundles = _bundles_from_allocation(X, items, len(agents))
 
     def there_is_item(i, j):
-        for item in range(len(bundles[j])):
-            new_bundle = bundles[j].copy()
-            new_bundle.pop(item)
-            if agents[i].valuation(new_bundle) <= valuations[i][i]:
-                return True
-        return False
-
-    for i in range(len(agents)):
-        for j in range(i + 1, len(agents)):
-            if valuations[i, i] < valuations[i, j]:
-                if not there_is_item(i, j):
-                    EF1_matrix[i, j] = 1
-            if valuations[j, j] < valuations[j, i]:
-                if not there_is_item(j, i):
-                    EF1_matrix[j, i] = 1
-    return np.sum(EF1_matrix > 0), np.sum(np.any(EF1_matrix > 0, axis=1))
+        contributions = _item_contributions(agents[i], bundles[j], valuations[i][j])
+        return any(valuations[i][j] - c <= valuations[i][i] for c in contributions)
+
+    # removing an item lowers a rank valuation by at most one, so agents envying a bundle
+    # by two or more cannot be helped by dropping any single item from it
+    return _count_violations(
+        np.argwhere(envy_matrix(valuations)),
+        lambda i, j: valuations[i][j] - valuations[i][i] > 1 or not there_is_item(i, j),
+        len(agents),
+        count_pairs,
+    )
 
 
 def EFX_violations(
@@ -101,6 +130,7 @@ def EFX_violations(
     items: list[ScheduleItem],
     bundles: list[list[ScheduleItem]] | None = None,
     valuations: type[np.ndarray] | None = None,
+    count_pairs: bool = True,
 ):
     """Compute envy-free up to any item (EF-X) violations.
 
@@ -115,32 +145,90 @@ def EFX_violations(
         schedule (list[ScheduleItem]): Items from class BaseItem
         bundles (list(list[ScheduleItem])): List of all agents bundles
         valuations (type[np.ndarray]): Valuations of all agents for all bundles under X
+        count_pairs (bool): If False, stop checking an agent after their first violation
 
     Returns:
-        int: number of EF-X violations
+        int | None: number of EF-X violations, None if count_pairs is False
         int: number of envious agents in the EF-X sense
     """
 
     if valuations is None:
         bundles, valuations = precompute_bundles_valuations(X, agents, items)
-
-    num_agents = len(agents)
-    EFX_matrix = np.zeros((num_agents, num_agents))
+    elif bundles is None:
+        bundles = _bundles_from_allocation(X, items, len(agents))
 
     def for_every_item(i, j):
-        for item in range(len(bundles[j])):
-            new_bundle = bundles[j].copy()
-            new_bundle.pop(item)
-            if agents[i].valuation(new_bundle) > valuations[i][i]:
-                return False
-        return True
-
-    for i in range(len(agents)):
-        for j in range(i + 1, len(agents)):
-            if valuations[i, i] < valuations[i, j]:
-                if not for_every_item(i, j):
-                    EFX_matrix[i, j] = 1
-            if valuations[j, j] < valuations[j, i]:
-                if not for_every_item(j, i):
-                    EFX_matrix[j, i] = 1
-    return np.sum(EFX_matrix > 0), np.sum(np.any(EFX_matrix > 0, axis=1))
+        contributions = _item_contributions(agents[i], bundles[j], valuations[i][j])
+        return all(valuations[i][j] - c <= valuations[i][i] for c in contributions)
+
+    # removing an item lowers a rank valuation by at most one, so agents envying a bundle
+    # by two or more still envy it after dropping any single item
+    return _count_violations(
+        np.argwhere(envy_matrix(valuations)),
+        lambda i, j: valuations[i][j] - valuations[i][i] > 1
+        or not for_every_item(i, j),
+        len(agents),
+        count_pairs,
+    )
+
+
+def envy_all(
+    X: type[np.ndarray],
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    bundles: list[list[ScheduleItem]] | None = None,
+    valuations: type[np.ndarray] | None = None,
+    count_pairs: bool = True,
+):
+    """Compute envy-free, EF-1 and EF-X violations together.
+
+    Equivalent to calling EF_violations, EF1_violations and EFX_violations, but pairs of
+    agents that envy by exactly one item are only revalued once, since EF-1 and EF-X are
+    both decided from the same item contributions.
+
+    Args:
+        X (type[np.ndarray]): Allocation matrix
+        agents (list[BaseAgent]): Agents from class BaseAgent
+        schedule (list[ScheduleItem]): Items from class BaseItem
+        bundles (list(list[ScheduleItem])): List of all agents bundles
+        valuations (type[np.ndarray]): Valuations of all agents for all bundles under X
+        count_pairs (bool): If False, stop revaluing an agent's pairs once it violates both EF-1 and EF-X
+
+    Returns:
+        dict[str, tuple[int | None, int]]: number of violations and number of violating
+            agents, keyed by "EF", "EF1" and "EFX". EF-1 and EF-X totals are None if
+            count_pairs is False
+    """
+
+    if valuations is None:
+        bundles, valuations = precompute_bundles_valuations(X, agents, items)
+    elif bundles is None:
+        bundles = _bundles_from_allocation(X, items, len(agents))
+
+    EF_matrix = envy_matrix(valuations)
+    # removing an item lowers a rank valuation by at most one, so envy by two or more
+    # violates both EF-1 and EF-X without revaluing anything
+    own = np.diag(valuations)
+    EF1_matrix = EF_matrix & (valuations - own[:, None] > 1)
+    EFX_matrix = EF1_matrix.copy()
+    for i, j in np.argwhere(EF_matrix & ~EF1_matrix):
+        if not count_pairs and EF1_matrix[i].any() and EFX_matrix[i].any():
+            continue
+        no_envy = [
+            valuations[i][j] - c <= valuations[i][i]
+            for c in _item_contributions(agents[i], bundles[j], valuations[i][j])
+        ]
+        EF1_matrix[i, j] = not any(no_envy)
+        EFX_matrix[i, j] = not all(no_envy)
+
+    return {
+        name: (
+            np.sum(matrix) if count_pairs or name == "EF" else None,
+            np.sum(np.any(matrix, axis=1)),
+        )
+        for name, matrix in [
+            ("EF", EF_matrix),
+            ("EF1", EF1_matrix),
+            ("EFX", EFX_matrix),
+        ]
+    }
@@ -25,14 +25,46 @@ class BaseFeature:
         self.name = name
         self.domain = domain
 
+        # hashed lookups; the first occurrence determines the index of a value
+        self._index = {}
+        for i, value in enumerate(domain):
+            self._index.setdefault(value, i)
+        self._values = frozenset(self._index)
+
     def index(self, value: Any):
-        return self.domain.index(value)
+        """Position of value in the domain
+
+        Args:
+            value (Any): Value from the domain
+
+        Raises:
+            ValueError: Value must belong to the domain
+
+        Returns:
+            int: Index of first occurrence of value
+        """
+        try:
+            return self._index[value]
+        except KeyError:
+            raise ValueError(f"{value} is not in domain of '{self.name}'")
+
+    def __contains__(self, value: Any):
+        return value in self._values
 
     def __repr__(self):
         return f"{self.name}: [{self.domain[0]} ... {self.domain[-1]}]"
 
     def __hash__(self):
-        return hash(self.name) ^ hash(tuple(self.domain))
+        # the domain is fixed at construction, like the index built from it
+        if "_hash" not in self.__dict__:
+            self._hash = hash(self.name) ^ hash(tuple(self.domain))
+        return self._hash
+
+    def __getstate__(self):
+        # string hashes differ between processes
+        state = self.__dict__.copy()
+        state.pop("_hash", None)
+        return state
 
     def __eq__(self, other):
         return hash(self) == hash(other)
@@ -1,3 +1,7 @@
+import hashlib
+import os
+import pickle
+import tempfile
 from typing import Any, List
 
 import pandas as pd
@@ -14,6 +18,49 @@ from .feature import (
 )
 
 
+def load_schedule(path: str, cache_path: str | None = None):
+    """Read schedule from excel file, optionally caching a binary snapshot
+
+    Parsing xlsx files is slow, so callers may provide cache_path, where the resulting
+    DataFrame is pickled together with a digest of the excel file. The snapshot is
+    only used while that digest matches, and an unreadable snapshot is ignored.
+    Writing the snapshot is best-effort.
+
+    Args:
+        path (str): Full path to excel file
+        cache_path (str | None, optional): Path of the binary snapshot. Defaults to None, for no caching.
+
+    Returns:
+        pd.DataFrame: Contents of the excel file
+    """
+    if cache_path is None:
+        # given a path, openpyxl opens the workbook read-only and streams the sheet
+        return pd.read_excel(path, engine="openpyxl")
+
+    with open(path, "rb") as fd:
+        digest = hashlib.sha256(fd.read()).hexdigest()
+    try:
+        snapshot = pd.read_pickle(cache_path)
+        if isinstance(snapshot, dict) and snapshot.get("sha256") == digest:
+            return snapshot["schedule"]
+    except (OSError, EOFError, pickle.UnpicklingError):
+        pass
+
+    df = pd.read_excel(path, engine="openpyxl")
+    try:
+        # write to a temporary file first, so an interrupted or concurrent load never
+        # leaves a truncated snapshot behind
+        with tempfile.NamedTemporaryFile(
+            "wb", dir=os.path.dirname(os.path.abspath(cache_path)), delete=False
+        ) as fd:
+            pd.to_pickle({"sha256": digest, "schedule": df}, fd)
+        os.replace(fd.name, cache_path)
+    except OSError:
+        pass
+
+    return df
+
+
 class BaseItem:
     """Item defined over multiple features"""
 
@@ -48,9 +95,17 @@ class BaseItem:
 
         # validate domain
         for feature, value in zip(self.features, self.values):
-            if value not in feature.domain:
+            if value not in feature:
                 raise DomainError(f"invalid value for feature '{feature}'")
 
+        self._map_values()
+
+    def _map_values(self):
+        """Map features to their values by identity, so lookups never hash a feature"""
+        self._value_map = {}
+        for feature, value in zip(self.features, self.values):
+            self._value_map.setdefault(id(feature), value)
+
     def value(self, feature: BaseFeature):
         """Value associated with a given feature
 
@@ -63,18 +118,38 @@ class BaseItem:
         Returns:
             Any: Value for feature
         """
+        try:
+            return self._value_map[id(feature)]
+        except KeyError:
+            pass
+
+        # an equal feature that is a different object, e.g. a copy
         try:
             return self.values[self.features.index(feature)]
-        except IndexError:
+        except ValueError:
             raise FeatureError("feature unknown for this item")
 
     def __repr__(self):
         return f"{self.name}: {[self.value(feature) for feature in self.features]}"
 
     def __hash__(self):
-        return hash(self.name) ^ hash(
-            tuple([self.value(feature) for feature in self.features])
-        )
+        # items are not modified after construction, so the hash is computed once
+        if "_hash" not in self.__dict__:
+            self._hash = hash(self.name) ^ hash(
+                tuple([self.value(feature) for feature in self.features])
+            )
+        return self._hash
+
+    def __getstate__(self):
+        # string hashes differ between processes and feature ids between copies
+        state = self.__dict__.copy()
+        state.pop("_hash", None)
+        state.pop("_value_map", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._map_values()
 
     def __lt__(self, other):
         return self.__hash__() < hash(other)
@@ -96,8 +171,7 @@ class ScheduleItem(BaseItem):
         Returns:
             List[ScheduleItem]: All items that could be extracted from excel file
         """
-        with open(path, "rb") as fd:
-            df = pd.read_excel(fd)
+        df = load_schedule(path)
         df = df[
             df.columns.intersection(
                 ["Catalog", "Section", "Mtg Time", "CICScapacity", "Categories"]
@@ -107,14 +181,18 @@ class ScheduleItem(BaseItem):
         course = Course(df["Catalog"].unique())
         section = Section(df["Section"].unique())
         time_slots = slot_list(frequency)
-        slot = Slot.from_time_ranges(df["Mtg Time"].unique(), "15T")
+        time_ranges = df["Mtg Time"].unique()
+        slot = Slot.from_time_ranges(time_ranges, "15T")
         features = [course, section, slot]
+
+        # each distinct time range is only converted to slots once
+        slots_map = {rng: slots_for_time_range(rng, time_slots) for rng in time_ranges}
         items = []
         for idx, row in df.iterrows():
             values = [
                 row["Catalog"],
                 row["Section"],
-                slots_for_time_range(row["Mtg Time"], time_slots),
+                slots_map[row["Mtg Time"]],
             ]
             try:
                 items.append(
@@ -4,13 +4,94 @@ import numpy as np
 
 from .agent import BaseAgent, LegacyStudent
 from .allocation import general_yankee_swap_E, get_bundle_from_allocation_matrix
-from .constraint import CourseTimeConstraint, MutualExclusivityConstraint
+from .constraint import (
+    CourseTimeConstraint,
+    MutualExclusivityConstraint,
+    compute_extent,
+)
 from .item import ScheduleItem, sub_schedule
 from .simulation import SubStudent
 
 
+def _bundles_from_allocation(
+    X: type[np.ndarray], items: list[ScheduleItem], num_agents: int
+):
+    """Bundles of all agents from a single pass over the allocation matrix
+
+    Args:
+        X (type[np.ndarray]): Allocation matrix
+        items (list[ScheduleItem]): Items from class BaseItem
+        num_agents (int): Number of agent columns in X
+
+    Returns:
+        list[list[ScheduleItem]]: ordered list of agents bundles
+    """
+    # nonzero over the transpose orders entries by agent, then by item
+    agent_idxs, item_idxs = np.nonzero(X[:, :num_agents].T.astype(int) == 1)
+    splits = np.cumsum(np.bincount(agent_idxs, minlength=num_agents))[:-1]
+    return [[items[i] for i in idxs] for idxs in np.split(item_idxs, splits)]
+
+
+def _agent_utilities(
+    X: type[np.ndarray],
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    valuations: type[np.ndarray] | None = None,
+):
+    """Utility of every agent for their own bundle
+
+    Args:
+        X (type[np.ndarray]): Allocation matrix
+        agents (list[BaseAgent]): Agents from class BaseAgent
+        schedule (list[ScheduleItem]): Items from class BaseItem
+        valuations (type[np.ndarray]): Valuations of all agents for all bundles under X
+
+    Returns:
+        np.ndarray: utilities for all agents, in agent order
+    """
+    if valuations is not None:
+        return np.diag(valuations)
+
+    bundles = _bundles_from_allocation(X, items, len(agents))
+    return np.array([agent.valuation(bundles[i]) for i, agent in enumerate(agents)])
+
+
+def _count_violations(
+    candidates: type[np.ndarray],
+    violates,
+    num_agents: int,
+    count_pairs: bool = True,
+):
+    """Count violating pairs and violating agents among candidate pairs
+
+    If count_pairs is False, the remaining candidates of an agent are skipped as soon
+    as one of them violates, since the agent is already counted.
+
+    Args:
+        candidates (type[np.ndarray]): (i, j) pairs of agents to check, sorted by i
+        violates (Callable[[int, int], bool]): whether agent i is in violation with respect to agent j
+        num_agents (int): Number of agents
+        count_pairs (bool): Whether the total number of violating pairs is needed
+
+    Returns:
+        int | None: number of violating pairs, None if count_pairs is False
+        int: number of agents with at least one violation
+    """
+    violations = np.zeros((num_agents, num_agents), dtype=bool)
+    for i, j in candidates:
+        if not count_pairs and violations[i].any():
+            continue
+        violations[i, j] = violates(i, j)
+
+    total = np.sum(violations) if count_pairs else None
+    return total, np.sum(np.any(violations, axis=1))
+
+
 def utilitarian_welfare(
-    X: type[np.ndarray], agents: list[BaseAgent], items: list[ScheduleItem]
+    X: type[np.ndarray],
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    valuations: type[np.ndarray] | None = None,
 ):
     """Compute utilitarian social welfare (USW)
 
@@ -20,20 +101,20 @@ def utilitarian_welfare(
         X (type[np.ndarray]): Allocation matrix
         agents (list[BaseAgent]): Agents from class BaseAgent
         schedule (list[ScheduleItem]): Items from class BaseItem
+        valuations (type[np.ndarray]): Valuations of all agents for all bundles under X
 
     Returns:
         float: USW / len(agents)
     """
-    util = 0
-    for agent_index, agent in enumerate(agents):
-        bundle = get_bundle_from_allocation_matrix(X, items, agent_index)
-        val = agent.valuation(bundle)
-        util += val
+    util = np.sum(_agent_utilities(X, agents, items, valuations))
     return util / (len(agents))
 
 
 def nash_welfare(
-    X: type[np.ndarray], agents: list[BaseAgent], items: list[ScheduleItem]
+    X: type[np.ndarray],
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    valuations: type[np.ndarray] | None = None,
 ):
     """Compute Nash social welfare (NSW)
 
@@ -44,42 +125,44 @@ def nash_welfare(
         X (type[np.ndarray]): Allocation matrix
         agents (list[BaseAgent]): Agents from class BaseAgent
         schedule (list[ScheduleItem]): Items from class BaseItem
+        valuations (type[np.ndarray]): Valuations of all agents for all bundles under X
 
     Returns:
         int: number of agents with utility 0
         float: n-root of NSW
     """
-    util = 0
-    num_zeros = 0
-    for agent_index, agent in enumerate(agents):
-        bundle = get_bundle_from_allocation_matrix(X, items, agent_index)
-        val = agent.valuation(bundle)
-        if val == 0:
-            num_zeros += 1
-        else:
-            util += np.log(val)
+    utilities = _agent_utilities(X, agents, items, valuations)
+    positive = utilities[utilities != 0]
+    num_zeros = len(utilities) - len(positive)
+    # small integer dtypes would otherwise be logged at half precision
+    util = np.sum(np.log(positive.astype(float)))
     return num_zeros, np.exp(util / (len(agents) - num_zeros))
 
 
-def leximin(X: type[np.ndarray], agents: list[BaseAgent], items: list[ScheduleItem]):
+def leximin(
+    X: type[np.ndarray],
+    agents: list[BaseAgent],
+    items: list[ScheduleItem],
+    valuations: type[np.ndarray] | None = None,
+    k: int | None = None,
+):
     """Compute Leximin vector, i.e. vector with agents utilities, sorted in decreasing order
 
     Args:
         X (type[np.ndarray]): Allocation matrix
         agents (list[BaseAgent]): Agents from class BaseAgent
         schedule (list[ScheduleItem]): Items from class BaseItem
+        valuations (type[np.ndarray]): Valuations of all agents for all bundles under X
+        k (int | None): If given, only the tail of the k worst off agents is returned
 
     Returns:
         list[int]: utilities for all agents
     """
-    valuations = []
-    for agent_index, agent in enumerate(agents):
-        bundle = get_bundle_from_allocation_matrix(X, items, agent_index)
-        val = agent.valuation(bundle)
-        valuations.append(val)
-    valuations.sort()
-    valuations.reverse()
-    return valuations
+    utilities = _agent_utilities(X, agents, items, valuations)
+    if k is not None and k < len(utilities):
+        # only the k smallest utilities need to be ordered
+        utilities = np.partition(utilities, k - 1)[:k]
+    return np.sort(utilities)[::-1].tolist()
 
 
 def precompute_bundles_valuations(
@@ -88,6 +171,8 @@ def precompute_bundles_valuations(
     """Precompute all agents bundles and all agent valuations for said bundles.
     This is a step necessary to run all envy metrics.
 
+    Integer valuations that fit are stored as int8 to keep metric passes compact.
+
     Args:
         X (type[np.ndarray]): Allocation matrix
         agents (list[BaseAgent]): Agents from class BaseAgent
@@ -97,13 +182,25 @@ def precompute_bundles_valuations(
         bundles (list(list[ScheduleItem])): ordered list of agnets bundles
         valuations (type[np.ndarray]): len(agents) x len(agents) matrix, element i,j is agent's i valuation of agent's j bundle under X
     """
-    bundles = [
-        get_bundle_from_allocation_matrix(X, items, i) for i in range(len(agents))
-    ]
+    bundles = _bundles_from_allocation(X, items, len(agents))
+
+    # agents holding the same bundle (often the empty one) share a bitset row,
+    # so each agent only values every distinct bundle once
+    bits = np.packbits(X[:, : len(agents)].T.astype(int) == 1, axis=1)
+    _, first, inverse = np.unique(bits, axis=0, return_index=True, return_inverse=True)
     valuations = np.zeros((len(agents), len(agents)))
     for i, agent in enumerate(agents):
-        for j, bundle in enumerate(bundles):
-            valuations[i, j] = agent.valuation(bundle)
+        distinct = [agent.valuation(bundles[j]) for j in first]
+        valuations[i] = np.array(distinct)[inverse]
+
+    int8 = np.iinfo(np.int8)
+    if (
+        np.array_equal(valuations, np.floor(valuations))
+        and valuations.min(initial=0) >= int8.min
+        and valuations.max(initial=0) <= int8.max
+    ):
+        valuations = valuations.astype(np.int8)
+
     return bundles, valuations
 
 
@@ -129,8 +226,13 @@ def yankee_swap_sub_problem(
     """
     course, slot, weekday, section = new_schedule[0].features
 
-    course_time_constr = CourseTimeConstraint.from_items(new_schedule, slot, weekday)
-    course_sect_constr = MutualExclusivityConstraint.from_items(new_schedule, course)
+    extent = compute_extent(new_schedule)
+    course_time_constr = CourseTimeConstraint.from_items(
+        new_schedule, slot, weekday, extent=extent
+    )
+    course_sect_constr = MutualExclusivityConstraint.from_items(
+        new_schedule, course, extent=extent
+    )
     preferred = agent.preferred_courses
     new_student = SubStudent(
         agent.student.quantities,
@@ -200,6 +302,7 @@ def PMMS_violations(
     items: list[ScheduleItem],
     bundles: list[list[ScheduleItem]] | None = None,
     valuations: type[np.ndarray] | None = None,
+    count_pairs: bool = True,
 ):
     """Compute number of violations of the Pairwise Maximin Share (PMMS) for an allocation X
 
@@ -213,28 +316,25 @@ def PMMS_violations(
          schedule (list[ScheduleItem]): Items from class BaseItem
          bundles (list(list[ScheduleItem])): List of all agents bundles
          valuations (type[np.ndarray]): Valuations of all agents for all bundles under X
+         count_pairs (bool): If False, stop checking an agent after their first violation
 
      Returns:
-         int: Number of PMMS violations
+         int | None: Number of PMMS violations, None if count_pairs is False
          int: Number of agents who did not receive their PMMS in every comparison
     """
     if valuations is None:
         bundles, valuations = precompute_bundles_valuations(X, agents, items)
-
-    PMMS_matrix = np.zeros((len(agents), len(agents)))
-    for i, student_1 in enumerate(agents):
-        bundle_1 = bundles[i]
-
-        for j in range(i + 1, len(agents)):
-            student_2 = agents[j]
-            bundle_2 = bundles[j]
-
-            if valuations[i, i] < valuations[i, j] - 1:
-                PMMS = pairwise_maximin_share(student_1, student_2, bundle_1, bundle_2)
-                PMMS_matrix[i, j] = valuations[i, i] - PMMS[student_1]
-
-            if valuations[j, j] < valuations[j, i] - 1:
-                PMMS = pairwise_maximin_share(student_2, student_1, bundle_2, bundle_1)
-                PMMS_matrix[j, i] = valuations[j, j] - PMMS[student_2]
-
-    return np.sum(PMMS_matrix < 0), np.sum(np.any(PMMS_matrix < 0, axis=1))
+    elif bundles is None:
+        bundles = _bundles_from_allocation(X, items, len(agents))
+
+    def below_PMMS(i, j):
+        PMMS = pairwise_maximin_share(agents[i], agents[j], bundles[i], bundles[j])
+        return valuations[i, i] < PMMS[agents[i]]
+
+    own = np.diag(valuations)
+    return _count_violations(
+        np.argwhere(own[:, None] < valuations - 1),
+        below_PMMS,
+        len(agents),
+        count_pairs,
+    )
@@ -17,24 +17,32 @@ class IntegerLinearProgram:
         self.c = None
         self.bounds = None
         self.constraint = None
+        self.agent_constraints = None
 
     def compile(self):
         """Create a single (block) constraint matrix for all agents
 
         Resulting block matrix A acts on an allocation vector that results from
-        concatenating all allocation indicator vectors across all agents.
+        concatenating all allocation indicator vectors across all agents. Compilation
+        happens once; subsequent calls return the already compiled program.
 
         Returns:
             IntegerLinearProgram: compiled IntegerLinearProgram
         """
+        if self.agent_constraints is not None:
+            return self
+
+        self.agent_constraints = [
+            agent.valuation.compile().constraints[0].to_sparse()
+            for agent in self.agents
+        ]
         A_blocks = []
         bs = []
-        for i, agent in enumerate(self.agents):
-            valuation = agent.valuation.compile()
+        for i, constraint in enumerate(self.agent_constraints):
             A_block = [None] * len(self.agents)
-            A_block[i] = valuation.constraints[0].to_sparse().A
+            A_block[i] = constraint.A
             A_blocks.append(A_block)
-            bs.append(valuation.constraints[0].to_sparse().b)
+            bs.append(constraint.b)
 
         self.A = scipy.sparse.bmat(A_blocks, format="csr")
         self.b = scipy.sparse.vstack(bs)
@@ -67,27 +75,42 @@ class IntegerLinearProgram:
 
         self.A = scipy.sparse.vstack([self.A, scipy.sparse.csr_matrix(Ap)])
         self.b = scipy.sparse.vstack([self.b, scipy.sparse.csr_matrix(bp)])
+        self.constraint = None
 
         return self
 
-    def formulateUSW(self):
+    def _formulate_constraints(self):
         """Put previously compiled constraints into scipy optimization format
 
+        The result does not depend on the objective, so it is shared by all
+        formulations until constraints are augmented.
+
+        Raises:
+            AttributeError: ILP cannot be formulated until it is compiled
+        """
+        if self.A is None or self.b is None:
+            raise AttributeError("IntegerLinearProgram must be compiled first")
+
+        if self.constraint is None:
+            n, _ = self.A.shape
+            self.bounds = scipy.optimize.Bounds(0, 1)
+            self.constraint = scipy.optimize.LinearConstraint(
+                self.A, ub=self.b.toarray().reshape((n,))
+            )
+
+    def formulateUSW(self):
+        """Formulate the program with a utilitarian social welfare objective
+
         Raises:
             AttributeError: ILP cannot be formulated until it is compiled
 
         Returns:
             IntegerLinearProgram: self
         """
-        if self.A is None or self.b is None:
-            raise AttributeError("IntegerLinearProgram must be compiled first")
+        self._formulate_constraints()
 
-        n, m = self.A.shape
+        _, m = self.A.shape
         self.c = -np.ones((m,))
-        self.bounds = scipy.optimize.Bounds(0, 1)
-        self.constraint = scipy.optimize.LinearConstraint(
-            self.A, ub=self.b.toarray().reshape((n,))
-        )
 
         return self
 
@@ -149,27 +172,31 @@ class StudentAllocationProgram(IntegerLinearProgram):
         Resulting block matrix A acts on an allocation vector that results from
         concatenating all allocation indicator vectors across all students. Beyond
         student linear constraints, also add capacity constraints for all courses
-        in schedule.
+        in schedule. Compilation happens once; subsequent calls return the already
+        compiled program.
 
         Returns:
             StudentAllocationProgram: compiled StudentAllocationProgram
         """
+        if self.agent_constraints is not None:
+            return self
+
         super().compile()
 
+        # each item row has a 1 in every agent block, at the item index within the block
         columns = self.A.shape[1]
-        A = scipy.sparse.lil_matrix((len(self.schedule), columns), dtype=np.int64)
-        b = scipy.sparse.lil_matrix((len(self.schedule), 1), dtype=np.int64)
-        extents = [
-            student.valuation.compile().constraints[0].extent for student in self.agents
-        ]
-        for row, item in enumerate(self.schedule):
-            block_offset = 0
-            for i in range(len(self.agents)):
-                block_idx = block_offset + item.index
-                A[row, block_idx] = 1
-                block_offset += extents[i]
-            b[row, 0] = item.capacity
-
-        self.add_constraint(A.tocsr(), b.tocsr())
+        extents = [constraint.extent for constraint in self.agent_constraints]
+        block_offsets = np.cumsum([0] + extents[:-1])
+        item_idxs = np.array([item.index for item in self.schedule])
+        rows = np.repeat(np.arange(len(self.schedule)), len(self.agents))
+        cols = (item_idxs[:, None] + block_offsets[None, :]).ravel()
+        A = scipy.sparse.coo_matrix(
+            (np.ones(len(rows), dtype=np.int64), (rows, cols)),
+            shape=(len(self.schedule), columns),
+        )
+        capacities = [item.capacity for item in self.schedule]
+        b = np.array(capacities, dtype=np.int64).reshape(len(self.schedule), 1)
+
+        self.add_constraint(A.tocsr(), scipy.sparse.csr_matrix(b))
 
         return self
@@ -3,7 +3,7 @@ from typing import List
 import numpy as np
 
 from fair.agent import BaseAgent
-from fair.constraint import LinearConstraint, PreferenceConstraint
+from fair.constraint import LinearConstraint, PreferenceConstraint, compute_extent
 from fair.feature import BaseFeature, Course, Section
 from fair.item import ScheduleItem
 from fair.valuation import ConstraintSatifactionValuation
@@ -43,7 +43,7 @@ class RenaissanceMan(SimulatedAgent):
     ):
         """
         Args:
-            topic_list (List[List[ScheduleItem]]): A list of lists of course items, one per topic
+            topic_list (List[List[ScheduleItem]]): A list of indexable sequences of course items, one per topic
             max_quantities (List[int]): The maximum number of courses desired per topic
             lower_max_courses (int): Lower bound for random selection of maximum number of courses (inclusive)
             upper_max_courses (int): Upper bound for random selection of maximum number of courses (inclusive)
@@ -64,11 +64,15 @@ class RenaissanceMan(SimulatedAgent):
         self.preferred_topics = []
         self.preferred_courses = []
         for i, quant in enumerate(self.quantities):
-            topic = rng.choice(topic_list[i], quant, replace=False).tolist()
+            # sample positions so topics need not be converted to object arrays
+            idxs = rng.choice(len(topic_list[i]), quant, replace=False)
+            topic = [topic_list[i][idx] for idx in idxs]
             self.preferred_topics.append(topic)
             self.preferred_courses += topic
 
         self.total_courses = rng.integers(lower_max_courses, upper_max_courses + 1)
+        # every constraint below spans the same schedule
+        extent = compute_extent(schedule)
         all_courses = [(item.value(course), item.value(section)) for item in schedule]
         self.all_courses_constraint = PreferenceConstraint.from_item_lists(
             schedule,
@@ -76,6 +80,7 @@ class RenaissanceMan(SimulatedAgent):
             [self.total_courses],
             [course, section],
             sparse,
+            extent,
         )
         undesirable_courses = [
             (item.value(course), item.value(section))
@@ -88,6 +93,7 @@ class RenaissanceMan(SimulatedAgent):
             [0],
             [course, section],
             sparse,
+            extent,
         )
         topic_values = [
             [(item.value(course), item.value(section)) for item in topic]
@@ -99,6 +105,7 @@ class RenaissanceMan(SimulatedAgent):
             self.quantities,
             [course, section],
             sparse,
+            extent,
         )
 
         constraints = global_constraints + [
@@ -147,6 +154,8 @@ class SubStudent(SimulatedAgent):
         self.preferred_courses = preferred_courses
         self.total_courses = total_courses
 
+        # every constraint below spans the same schedule
+        extent = compute_extent(schedule)
         all_courses = [(item.value(course), item.value(section)) for item in schedule]
 
         self.all_courses_constraint = PreferenceConstraint.from_item_lists(
@@ -155,6 +164,7 @@ class SubStudent(SimulatedAgent):
             [self.total_courses],
             [course, section],
             sparse,
+            extent,
         )
         undesirable_courses = [
             (item.value(course), item.value(section))
@@ -167,6 +177,7 @@ class SubStudent(SimulatedAgent):
             [0],
             [course, section],
             sparse,
+            extent,
         )
         topic_values = [
             [(item.value(course), item.value(section)) for item in topic]
@@ -178,6 +189,7 @@ class SubStudent(SimulatedAgent):
             self.quantities,
             [course, section],
             sparse,
+            extent,
         )
 
         constraints = global_constraints + [
@@ -1,4 +1,6 @@
 import random
+from copy import deepcopy
+from functools import lru_cache
 
 import numpy as np
 from scipy import stats
@@ -67,20 +69,40 @@ def integer(bits: np.ndarray) -> int:
     return integer
 
 
+@lru_cache(maxsize=None)
+def _bits_table(n: int) -> np.ndarray:
+    """Bits of every integer that can be encoded with n bits
+
+    Args:
+        n (int): Number of bits
+
+    Returns:
+        np.ndarray: 2**n X n read-only matrix, row i holding the bits of i as in binary(i, n)
+    """
+    shifts = np.arange(n - 1, -1, -1)
+    table = ((np.arange(2**n)[:, None] >> shifts) & 1).astype(np.uint8)
+    table.setflags(write=False)
+
+    return table
+
+
+@lru_cache(maxsize=None)
 def transformation(n: int) -> np.ndarray:
     """Transformation matrix H (binary to categorical)
 
+    The matrix is built once per number of bits and shared between callers, so it is
+    returned read-only
+
     Args:
         n (int): Number of bits
 
     Returns:
         np.ndarray: n X 2**n matrix with columns encoding ints 0 to 2**n-1
     """
-    columns = []
-    for i in range(2**n):
-        columns.append(binary(i, n))
+    H = _bits_table(n).T.astype(int)
+    H.setflags(write=False)
 
-    return np.vstack(columns).T
+    return H
 
 
 def transform(bernoullis: np.ndarray) -> int:
@@ -109,12 +131,13 @@ def aggregate(bernoullis: list[np.ndarray], H: np.ndarray) -> np.ndarray:
     """
     n, m = bernoullis.shape
     w = 2**m
-    d = np.zeros((1, w))
-    for row in range(n):
-        h_index = transform(bernoullis[row][:, None])
-        d += np.eye(1, w, h_index)
 
-    return d
+    # each row matches the column of H for the integer its bits encode
+    powers = 1 << np.arange(m - 1, -1, -1)
+    h_indexes = np.asarray(bernoullis, dtype=np.int64) @ powers
+    d = np.bincount(h_indexes, minlength=w).astype(np.float64)
+
+    return d.reshape((1, w))
 
 
 class StandardDeviations:
@@ -177,8 +200,9 @@ class Correlation:
         Returns:
             Correlation: Correlation object
         """
-        V_inv = np.linalg.inv(V())
-        self._data = V_inv**0.5 @ Sigma() @ V_inv**0.5
+        # V is diagonal, so scaling by its inverse square root is done elementwise
+        v_inv_sqrt = np.diag(V()) ** -0.5
+        self._data = Sigma() * np.outer(v_inv_sqrt, v_inv_sqrt)
 
         return self
 
@@ -209,14 +233,10 @@ class Update:
         Returns:
             np.ndarray: Update matrix U
         """
-        n, _ = self.bernoullis.shape
-        w = H.shape[1]
-        Delta = np.zeros((w, w))
-        for row in range(n):
-            h_index = transform(self.bernoullis[row][:, None])
-            Delta[h_index, h_index] += 1
+        delta = aggregate(self.bernoullis, H).ravel()
 
-        return H @ Delta @ H.T
+        # Delta is diagonal, so H @ Delta only scales the columns of H
+        return (H * delta) @ H.T
 
     def indirect(self) -> np.ndarray:
         """Calculate U without materializing H
@@ -224,13 +244,12 @@ class Update:
         Returns:
             np.ndarray: Update matrix
         """
-        m = self.bernoullis.shape[1]
-        U = np.zeros((m, m))
-        for row in range(self.bernoullis.shape[0]):
-            bits = self.bernoullis[row, :]
-            U += np.outer(bits, bits)
+        # the sum of the outer products of all rows, as a single matrix product; counts
+        # of 0/1 products are exact in single precision for fewer than 2**24 rows
+        dtype = np.float32 if self.bernoullis.shape[0] < 2**24 else np.float64
+        bits = np.asarray(self.bernoullis, dtype=dtype)
 
-        return U
+        return (bits.T @ bits).astype(np.float64)
 
 
 class Shape:
@@ -515,6 +534,17 @@ class mBetaApprox(mBeta):
             marginals=[marginal() for marginal in self.marginals],
         )
 
+    def clone(self) -> "mBetaApprox":
+        """Independent copy of this distribution
+
+        The copy shares the random number generator, so the two do not draw the same
+        samples
+
+        Returns:
+            mBetaApprox: Copy of the approximate mBeta distribution
+        """
+        return deepcopy(self, {id(self.rng): self.rng})
+
     def sample(self, n: int = 1) -> np.ndarray:
         """Sample from approximate mBeta distribution
 
@@ -553,20 +583,33 @@ class mBetaMixture(mBeta):
         self.mBetas = mBetas
 
     def sample(self, n: int = 1) -> np.ndarray:
-        """Choose an mBeta uniformly at random, then sample from it
+        """Choose an mBeta uniformly at random, then sample from it, for each sample
 
         Args:
             n (int, optional): Number of samples to draw. Defaults to 1.
 
         Returns:
             np.ndarray: Samples from mBetaMixture
-        """
-        samples = []
-        for i in range(n):
-            mBeta = self.rng.choice(self.mBetas)
-            samples.append(mBeta.sample())
 
-        return np.vstack(samples)
+        Raises:
+            ValueError: n must be at least 1
+        """
+        if n < 1:
+            raise ValueError("n must be at least 1")
+
+        # every chosen component is sampled once, for all the rows that chose it
+        choices = self.rng.integers(len(self.mBetas), size=n)
+        samples = None
+        for j in np.unique(choices):
+            rows = np.flatnonzero(choices == j)
+            component_samples = np.reshape(
+                self.mBetas[j].sample(len(rows)), (len(rows), -1)
+            )
+            if samples is None:
+                samples = np.empty((n, component_samples.shape[1]))
+            samples[rows] = component_samples
+
+        return samples
 
 
 class GOF(mBeta):
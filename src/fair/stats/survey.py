@@ -1,14 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 
 from ..item import ScheduleItem
 from ..simulation import RenaissanceMan
-from . import Correlation, Mean, Shape, bernoulli_samples, mBetaApprox, mBetaMixture
+from . import Correlation, Mean, Shape, mBetaApprox, mBetaMixture
+
+
+def _bernoulli_f32(
+    P: np.ndarray, rng: np.random.Generator, shape: tuple[int] | None = None
+) -> np.ndarray:
+    """Bernoulli samples, thresholding single-precision uniform variates
+
+    Only the order of each variate and its parameter matters, so single precision is
+    sufficient and halves the random data generated
+
+    Args:
+        P (np.ndarray): Bernoulli parameters, broadcastable to shape
+        rng (np.random.Generator): Random number generator
+        shape (tuple[int] | None, optional): Shape of the samples. Defaults to P.shape.
+
+    Returns:
+        np.ndarray: uint8 samples of the given shape
+    """
+    shape = P.shape if shape is None else shape
+    U = rng.random(shape, dtype=np.float32)
+
+    return (U < P.astype(np.float32)).astype(np.uint8)
 
 
 class BaseSurvey:
     """Abstract survey class"""
 
-    pass
+    def _schedule_key(self) -> tuple[int]:
+        """Hashes of the schedule items, in order, computed on first use
+
+        Items are equal exactly when their hashes are, so surveys over matching
+        schedules have equal keys
+
+        Returns:
+            tuple[int]: Hash of every item in the schedule
+        """
+        if "_key" not in self.__dict__:
+            self._key = tuple(hash(item) for item in self.schedule)
+        return self._key
+
+    def __getstate__(self):
+        # item hashes depend on the process, so the key is recomputed after unpickling
+        state = self.__dict__.copy()
+        state.pop("_key", None)
+        return state
 
 
 class SingleTopicSurvey(BaseSurvey):
@@ -62,23 +103,45 @@ class SingleTopicSurvey(BaseSurvey):
             response_upper_extent (int): Maximum possible response value
         """
         self.schedule = schedule
-        self.response_map = {schedule[i]: responses[i] for i in range(len(schedule))}
+        self.responses = responses
         self.limit = limit
         self.response_lower_extent = response_lower_extent
         self.response_upper_extent = response_upper_extent
         self.m = len(self.schedule)
 
+        # responses in schedule order, so data never looks items up by hash
+        self._responses = np.fromiter(
+            (responses[i] for i in range(self.m)), dtype=np.float64, count=self.m
+        )
+
+    @property
+    def response_map(self) -> dict[ScheduleItem, int]:
+        """Responses keyed by schedule item, built on first use
+
+        Returns:
+            dict[ScheduleItem, int]: Response for every item in the schedule
+        """
+        if "_response_map" not in self.__dict__:
+            self._response_map = {
+                self.schedule[i]: self.responses[i] for i in range(self.m)
+            }
+        return self._response_map
+
     def data(self) -> np.ndarray:
         """Create data vector from responses
 
+        The vector is computed once per pair of extents and shared between calls, so it
+        is returned read-only
+
         Raises:
             ValueError: Upper extent must be greater than lower extent for normalization
 
         Returns:
             np.ndarray: Vector of normalized responses
         """
-        data = np.array([self.response_map[item] for item in self.schedule])
-        sm = data.sum()
+        extents = (self.response_lower_extent, self.response_upper_extent)
+        if self.__dict__.get("_data_extents") == extents:
+            return self._data
 
         if self.response_upper_extent <= self.response_lower_extent:
             raise ValueError(
@@ -86,11 +149,15 @@ class SingleTopicSurvey(BaseSurvey):
             )
 
         # normalize data
-        data = (data - self.response_lower_extent) / (
+        data = (self._responses - self.response_lower_extent) / (
             self.response_upper_extent - self.response_lower_extent
         )
+        data = data.reshape((1, self.m))
+        data.setflags(write=False)
+        self._data = data
+        self._data_extents = extents
 
-        return data.reshape((1, self.m))
+        return self._data
 
 
 class Corpus:
@@ -118,14 +185,40 @@ class Corpus:
 
         base = self.surveys[0]
         for survey in self.surveys[1:]:
-            if len(base.schedule) != len(survey.schedule):
+            # surveys are usually built from the same schedule, which needs no hashing
+            if survey.schedule is base.schedule:
+                continue
+            if survey._schedule_key() != base._schedule_key():
                 return False
-            for i in range(len(base.schedule)):
-                if base.schedule[i] != survey.schedule[i]:
-                    return False
 
         return True
 
+    def _probabilities(self) -> np.ndarray:
+        """Survey data stacked into one matrix, reused while the data are unchanged
+
+        Returns:
+            np.ndarray: Read-only (surveys X m) matrix of Bernoulli parameters
+        """
+        data = [survey.data() for survey in self.surveys]
+        cached = self.__dict__.get("_P_data", [])
+        if len(cached) != len(data) or any(a is not b for a, b in zip(cached, data)):
+            self._P = np.vstack(data)
+            self._P.setflags(write=False)
+            self._P_data = data
+
+        return self._P
+
+    def _make_prior(self, m: int) -> mBetaApprox:
+        """Prior approximate mBeta distribution shared by the corpus methods
+
+        Args:
+            m (int): Number of dimensions
+
+        Returns:
+            mBetaApprox: Prior approximate mBeta distribution
+        """
+        return mBetaApprox(Correlation(m), Mean(m), Shape(0.001), self.rng)
+
     def distribution(self) -> mBetaApprox:
         """Create an mBeta distribution from the survey data
 
@@ -138,18 +231,37 @@ class Corpus:
         if not self._valid():
             raise ValueError("Invalid Corpus for generating distribution")
 
-        m = self.surveys[0].m
-        R = Correlation(m)
-        nu = Shape(0.001)
-        mu = Mean(m)
-        mbeta = mBetaApprox(R, mu, nu, self.rng)
-        for survey in self.surveys:
-            sample = bernoulli_samples(survey.data(), self.rng)
-            mbeta.update(sample)
+        mbeta = self._make_prior(self.surveys[0].m)
+
+        # one draw per survey, all made at once; the posterior only depends on the
+        # accumulated samples, so a single update is equivalent to one per survey
+        P = self._probabilities()
+        samples = _bernoulli_f32(P, self.rng)
+        mbeta.update(samples)
 
         return mbeta
 
-    def kde_distribution(self, n: int = 1, k: int = 1) -> mBetaMixture:
+    def _survey_kde(self, prior: mBetaApprox, samples: np.ndarray) -> mBetaMixture:
+        """Mixture of sub-kernels for one survey
+
+        Args:
+            prior (mBetaApprox): Prior shared by all sub-kernels, which is not modified
+            samples (np.ndarray): (k X n X m) Bernoulli samples, one block per sub-kernel
+
+        Returns:
+            mBetaMixture: Approximate mBeta mixture for the survey
+        """
+        mbetas = []
+        for sub_samples in samples:
+            mbeta = prior.clone()
+            mbeta.update(sub_samples)
+            mbetas.append(mbeta)
+
+        return mBetaMixture(mbetas, self.rng)
+
+    def kde_distribution(
+        self, n: int = 1, k: int = 1, max_workers: int | None = None
+    ) -> mBetaMixture:
         """Create a mixture of mBeta distributions, one for each survey
 
         Corresponding to each survey, k sub-kernels are generated, each drawing
@@ -160,6 +272,8 @@ class Corpus:
         Args:
             n (int, optional): Number of samples per sub-kernel. Defaults to 1.
             k (int, optional): Sub-kernals per survey. Defaults to 1.
+            max_workers (int | None, optional): Threads used to build the survey kernels, serially if None.
+                All samples are drawn beforehand, so results do not depend on it. Defaults to None.
 
         Raises:
             ValueError: Corpus must pass validation
@@ -170,18 +284,21 @@ class Corpus:
         if not self._valid():
             raise ValueError("Invalid Corpus for generating distribution")
 
-        mbeta_kdes = []
-        for survey in self.surveys:
-            mbetas = []
-            for i in range(k):
-                m = self.surveys[0].m
-                R = Correlation(m)
-                nu = Shape(0.001)
-                mu = Mean(m)
-                mbeta = mBetaApprox(R, mu, nu, self.rng)
-                sample = bernoulli_samples(survey.data(), self.rng, n)
-                mbeta.update(sample)
-                mbetas.append(mbeta)
-            mbeta_kdes.append(mBetaMixture(mbetas, self.rng))
+        # the samples of every sub-kernel are drawn together, then viewed per sub-kernel
+        m = self.surveys[0].m
+        P = self._probabilities()
+        samples = _bernoulli_f32(
+            P[:, None, None, :], self.rng, (len(self.surveys), k, n, m)
+        )
+
+        # every sub-kernel starts from the same prior, which is only constructed once
+        prior = self._make_prior(m)
+        if max_workers is None:
+            mbeta_kdes = [self._survey_kde(prior, sub) for sub in samples]
+        else:
+            with ThreadPoolExecutor(max_workers) as executor:
+                mbeta_kdes = list(
+                    executor.map(lambda sub: self._survey_kde(prior, sub), samples)
+                )
 
         return mBetaMixture(mbeta_kdes, self.rng)
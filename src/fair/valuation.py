@@ -1,6 +1,8 @@
 from copy import deepcopy
 from typing import List
 
+import numpy as np
+
 from fair.item import BaseItem
 
 from .constraint import BaseConstraint
@@ -24,6 +26,20 @@ class RankValuation(BaseValuation):
         """
         raise NotImplemented
 
+    def independent_batch(self, bundles: List[List[BaseItem]]):
+        """Do the bundles receive maximal value
+
+        Child classes may override this with a vectorized check; by default every
+        bundle is checked with independent
+
+        Args:
+            bundles (List[List[BaseItem]]): Items in each bundle
+
+        Returns:
+            List[bool]: True for every bundle that receives maximal value; False otherwise
+        """
+        return [self.independent(bundle) for bundle in bundles]
+
     def value(self, bundle: List[BaseItem]):
         """Value of bundle
 
@@ -84,6 +100,55 @@ class MemoableValuation:
 
         return self._independent_memo[hashable_bundle]
 
+    def _independent_batch(self, bundles: List[List[BaseItem]]):
+        """Actual calculation of independence for several bundles
+
+        Child classes may override this to evaluate all bundles at once
+
+        Args:
+            bundles (List[List[BaseItem]]): Items in each bundle
+
+        Returns:
+            List[bool]: True for every bundle that receives maximal value; False otherwise
+        """
+        return [self._independent(bundle) for bundle in bundles]
+
+    def independent_batch(self, bundles: List[List[BaseItem]]):
+        """Does each bundle receive maximal value
+
+        Cached values are retrieved as in independent, and the remaining bundles are
+        calculated together
+
+        Args:
+            bundles (List[List[BaseItem]]): Items in each bundle
+
+        Returns:
+            List[bool]: True for every bundle that receives maximal value; False otherwise
+        """
+        self._independent_ct += len(bundles)
+
+        if not self.memoize:
+            self._unique_independent_ct += len(bundles)
+            return list(self._independent_batch(bundles))
+
+        hashable_bundles = [tuple(sorted(bundle)) for bundle in bundles]
+        missing = list(
+            dict.fromkeys(
+                hashable_bundle
+                for hashable_bundle in hashable_bundles
+                if hashable_bundle not in self._independent_memo
+            )
+        )
+        if len(missing) > 0:
+            results = self._independent_batch([list(bundle) for bundle in missing])
+            self._independent_memo.update(zip(missing, results))
+            self._unique_independent_ct += len(missing)
+
+        return [
+            self._independent_memo[hashable_bundle]
+            for hashable_bundle in hashable_bundles
+        ]
+
     def _value(self, bundle: List[BaseItem]):
         """Actual implementation of value function
 
@@ -155,6 +220,23 @@ class ConstraintSatifactionValuation(MemoableValuation):
 
         return satisfies
 
+    def _independent_batch(self, bundles: List[List[BaseItem]]):
+        """Do several bundles receive maximal value
+
+        Each constraint tests all bundles with a single matrix product
+
+        Args:
+            bundles (List[List[BaseItem]]): Items in each bundle
+
+        Returns:
+            List[bool]: True for every bundle that receives maximal value; False otherwise
+        """
+        satisfies = np.ones(len(bundles), dtype=bool)
+        for constraint in self.constraints:
+            satisfies &= constraint.satisfies_batch(bundles)
+
+        return satisfies.tolist()
+
     def _value(self, bundle: List[BaseItem]):
         """Value of bundle
 
@@ -169,12 +251,46 @@ class ConstraintSatifactionValuation(MemoableValuation):
         if self.independent(bundle):
             return len(bundle)
 
-        bundle = list(deepcopy(bundle))
+        bundle = list(bundle)
         indep = []
+        incremental = all(
+            hasattr(constraint, name)
+            for constraint in self.constraints
+            for name in ["product", "delta_product", "delta_satisfies"]
+        )
+        if not incremental:
+            # constraints that only implement satisfies are checked bundle by bundle
+            while len(bundle) > 0:
+                cand = bundle.pop()
+                if self.independent(indep + [cand]):
+                    indep.append(cand)
+
+            return len(indep)
+
+        # the independent set only ever grows by one item, so its constraint products
+        # are updated incrementally instead of being recomputed for every candidate;
+        # these checks are counted as independence checks, but are not memoized
+        indep_idxs = set()
+        products = [constraint.product([]) for constraint in self.constraints]
         while len(bundle) > 0:
             cand = bundle.pop()
-            if self.independent(indep + [cand]):
+            if cand.index in indep_idxs:
+                # a repeated item does not change the indicator of the independent set
                 indep.append(cand)
+                continue
+
+            self._independent_ct += 1
+            self._unique_independent_ct += 1
+            if all(
+                constraint.delta_satisfies(product, [cand])
+                for constraint, product in zip(self.constraints, products)
+            ):
+                indep.append(cand)
+                indep_idxs.add(cand.index)
+                products = [
+                    constraint.delta_product(product, [cand])
+                    for constraint, product in zip(self.constraints, products)
+                ]
 
         return len(indep)
 
@@ -206,6 +322,9 @@ class UniqueItemsValuation:
         self.valuation = valuation
 
     def __getattr__(self, name):
+        if name == "valuation":
+            # valuation is not yet set, e.g. while unpickling
+            raise AttributeError(name)
         if name == "independent":
             return self.independent
         elif name == "value":
@@ -224,6 +343,19 @@ class UniqueItemsValuation:
         """
         return self.valuation.independent(list(set(bundle)))
 
+    def independent_batch(self, bundles: List[List[BaseItem]]):
+        """Do the unique items in each bundle receive maximal value
+
+        Args:
+            bundles (List[List[BaseItem]]): Items in each bundle
+
+        Returns:
+            List[bool]: True for every bundle that receives maximal value; False otherwise
+        """
+        return self.valuation.independent_batch(
+            [list(set(bundle)) for bundle in bundles]
+        )
+
     def value(self, bundle: List[BaseItem]):
         """Value of unique items in bundle
 
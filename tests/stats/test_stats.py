@@ -1,4 +1,5 @@
 import numpy as np
+import pytest
 import scipy
 import statsmodels
 
@@ -12,6 +13,7 @@ from fair.stats import (
     Shape,
     StandardDeviations,
     Update,
+    _bits_table,
     aggregate,
     binary,
     integer,
@@ -28,6 +30,10 @@ def test_index_to_vector():
     with np.testing.assert_raises(OverflowError):
         binary(3, 1)
 
+    table = _bits_table(3)
+    for i in range(2**3):
+        np.testing.assert_array_equal(table[i], binary(i, 3))
+
 
 def test_convert_int_bits():
     assert integer(binary(5, 3)) == 5
@@ -43,6 +49,16 @@ def test_transform():
     assert index == integer(bits)
 
 
+def test_aggregate(bernoullis: np.ndarray):
+    _, m = bernoullis.shape
+    d = aggregate(bernoullis, transformation(m))
+
+    expected = np.zeros((1, 2**m))
+    for row in bernoullis:
+        expected[0, integer(row)] += 1
+    np.testing.assert_array_equal(d, expected)
+
+
 def test_transformation():
     trans = transformation(3)
     H3 = np.array(
@@ -51,12 +67,22 @@ def test_transformation():
 
     np.testing.assert_array_equal(trans, H3)
 
+    # the matrix is cached and shared, so it cannot be modified
+    assert transformation(3) is trans
+    assert not trans.flags.writeable
+
 
 def test_update(bernoullis: np.ndarray):
     U = Update(bernoullis)
 
     np.testing.assert_array_equal(U.direct(transformation(3)), U.indirect())
 
+    # samples stored as uint8 give exact counts in double precision
+    samples = np.random.default_rng(0).integers(0, 2, (1000, 3), dtype=np.uint8)
+    U = Update(samples).indirect()
+    assert U.dtype == np.float64
+    np.testing.assert_array_equal(U, samples.T.astype(int) @ samples.astype(int))
+
 
 def test_prior_posterior(bernoullis: np.ndarray):
     # data
@@ -116,6 +142,18 @@ def test_mbeta(bernoullis: np.ndarray):
     assert mbeta.sample(2).shape == (2, m)
 
 
+def test_mbeta_clone(bernoullis: np.ndarray):
+    _, m = bernoullis.shape
+    prior = mBetaApprox(Correlation(m), Mean(m), Shape(1), np.random.default_rng(0))
+    mbeta = prior.clone()
+    mbeta.update(bernoullis)
+
+    assert mbeta.rng is prior.rng
+    assert prior.nu() == 1
+    np.testing.assert_array_equal(prior.R(), np.eye(m))
+    assert not np.array_equal(mbeta.mu(), prior.mu())
+
+
 def test_random_exact():
     m = 3
     n = 10
@@ -169,6 +207,23 @@ def test_random_mBetaMixture():
     assert not np.array_equal(mBetaMixture1.sample(n), mBetaMixture3.sample(n))
 
 
+def test_mBetaMixture_shape(bernoullis: np.ndarray):
+    _, m = bernoullis.shape
+    mbeta_approx = mBetaApprox(Correlation(m), Mean(m), Shape(1))
+    mbeta_approx.update(bernoullis)
+    gamma = np.ones((2**m,))
+    mbeta_exact = mBetaExact(gamma, np.random.default_rng(0))
+    mixture = mBetaMixture([mbeta_approx, mbeta_exact], np.random.default_rng(0))
+    nested = mBetaMixture([mixture, mbeta_exact], np.random.default_rng(0))
+
+    for n in [1, 2, 10]:
+        assert mixture.sample(n).shape == (n, m)
+        assert nested.sample(n).shape == (n, m)
+
+    with pytest.raises(ValueError):
+        mixture.sample(0)
+
+
 def test_goodness_of_fit_same():
     m = 3
     n = 10
@@ -229,9 +284,10 @@ def test_aggregates_not_enough_for_U():
     d_v2 = aggregate(bernoullis2, H3)
 
     # form Delta matrices: diagonal matrix formed from d
-    # pre- and post-multiply Delta by H3 to form U matrices
-    U_v1 = H3 @ np.diag(d_v1.reshape((w,))) @ H3.T
-    U_v2 = H3 @ np.diag(d_v2.reshape((w,))) @ H3.T
+    # pre- and post-multiply Delta by H3 to form U matrices; scaling the columns of H3
+    # by d is the same as multiplying by Delta, without materializing it
+    U_v1 = (H3 * d_v1.reshape((1, w))) @ H3.T
+    U_v2 = (H3 * d_v2.reshape((1, w))) @ H3.T
 
     # show that the two U matrices differ
     with np.testing.assert_raises(AssertionError):
@@ -1,9 +1,11 @@
+import pickle
+
 import numpy as np
 
 from fair.feature import Course
 from fair.item import ScheduleItem
 from fair.simulation import RenaissanceMan
-from fair.stats.survey import Corpus, SingleTopicSurvey
+from fair.stats.survey import Corpus, SingleTopicSurvey, _bernoulli_f32
 
 
 def test_single_topic_survey(
@@ -37,6 +39,16 @@ def test_corpus_validation(
     assert corpus1._valid()
     assert not corpus2._valid()
 
+    survey4 = SingleTopicSurvey.from_student(simple_schedule[:2], student, 0, 1)
+    assert not Corpus([survey1, survey4])._valid()
+    assert Corpus([pickle.loads(pickle.dumps(survey1)), survey2])._valid()
+
+    # a shared schedule is matched by identity, without computing keys
+    survey5 = SingleTopicSurvey.from_student(simple_schedule, student, 0, 1)
+    survey6 = SingleTopicSurvey.from_student(simple_schedule, student2, 0, 1)
+    assert Corpus([survey5, survey6])._valid()
+    assert "_key" not in survey5.__dict__ and "_key" not in survey6.__dict__
+
 
 def test_random_corpus(
     simple_schedule: list[ScheduleItem],
@@ -61,3 +73,97 @@ def test_random_corpus(
     assert not np.array_equal(
         corpus02.kde_distribution().sample(2), corpus1.kde_distribution().sample(2)
     )
+
+
+def test_survey_normalization(simple_schedule: list[ScheduleItem]):
+    responses = list(range(1, len(simple_schedule) + 1))
+    survey = SingleTopicSurvey(simple_schedule, responses, 2, 1, len(responses))
+
+    np.testing.assert_allclose(
+        survey.data(), [np.linspace(0, 1, len(responses))], atol=1e-12
+    )
+
+    # normalized data is cached until the extents change
+    assert survey.data() is survey.data()
+    assert not survey.data().flags.writeable
+
+    survey.response_upper_extent = survey.response_lower_extent
+    with np.testing.assert_raises(ValueError):
+        survey.data()
+
+
+def test_corpus_distribution(
+    simple_schedule: list[ScheduleItem],
+    student: RenaissanceMan,
+    student2: RenaissanceMan,
+):
+    survey1 = SingleTopicSurvey.from_student(simple_schedule, student, 0, 1)
+    survey2 = SingleTopicSurvey.from_student(simple_schedule, student2, 0, 1)
+    corpus = Corpus([survey1, survey2], np.random.default_rng(0))
+    mbeta = corpus.distribution()
+
+    # one sample vector is drawn per survey
+    np.testing.assert_allclose(mbeta.nu(), 0.001 + 2)
+    assert mbeta.sample(2).shape == (2, len(simple_schedule))
+
+
+def test_corpus_kde_distribution(
+    simple_schedule: list[ScheduleItem],
+    student: RenaissanceMan,
+    student2: RenaissanceMan,
+):
+    survey1 = SingleTopicSurvey.from_student(simple_schedule, student, 0, 1)
+    survey2 = SingleTopicSurvey.from_student(simple_schedule, student2, 0, 1)
+    corpus = Corpus([survey1, survey2], np.random.default_rng(0))
+    mixture = corpus.kde_distribution(3, 2)
+
+    assert len(mixture.mBetas) == 2
+    for kde in mixture.mBetas:
+        assert len(kde.mBetas) == 2
+        for mbeta in kde.mBetas:
+            np.testing.assert_allclose(mbeta.nu(), 0.001 + 3)
+
+
+def test_bernoulli_f32():
+    P = np.array([[0, 1, 0.5]])
+    samples = _bernoulli_f32(P, np.random.default_rng(0), (1000, 3))
+
+    assert samples.dtype == np.uint8
+    assert samples.shape == (1000, 3)
+    assert samples[:, 0].sum() == 0
+    assert samples[:, 1].sum() == 1000
+    assert 400 < samples[:, 2].sum() < 600
+
+
+def test_corpus_probabilities(
+    simple_schedule: list[ScheduleItem],
+    student: RenaissanceMan,
+    student2: RenaissanceMan,
+):
+    survey1 = SingleTopicSurvey.from_student(simple_schedule, student, 0, 1)
+    survey2 = SingleTopicSurvey.from_student(simple_schedule, student2, 0, 1)
+    corpus = Corpus([survey1, survey2])
+    P = corpus._probabilities()
+
+    np.testing.assert_array_equal(P, np.vstack([survey1.data(), survey2.data()]))
+    assert corpus._probabilities() is P
+
+    # the stack is rebuilt once survey data change
+    survey2.response_upper_extent = 2
+    np.testing.assert_array_equal(corpus._probabilities()[1], survey2.data()[0])
+
+
+def test_corpus_kde_workers(
+    simple_schedule: list[ScheduleItem],
+    student: RenaissanceMan,
+    student2: RenaissanceMan,
+):
+    survey1 = SingleTopicSurvey.from_student(simple_schedule, student, 0, 1)
+    survey2 = SingleTopicSurvey.from_student(simple_schedule, student2, 0, 1)
+    serial = Corpus([survey1, survey2], np.random.default_rng(0))
+    threaded = Corpus([survey1, survey2], np.random.default_rng(0))
+
+    np.testing.assert_array_equal(
+        serial.kde_distribution(2, 2).sample(4),
+        threaded.kde_distribution(2, 2, max_workers=2).sample(4),
+    )
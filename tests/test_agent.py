@@ -2,7 +2,10 @@ from fair.agent import (
     LegacyStudent,
     Student,
     exchange_contribution,
+    exchange_contribution_batch,
+    item_contributions,
     marginal_contribution,
+    marginal_contribution_batch,
 )
 from fair.constraint import (
     CourseTimeConstraint,
@@ -11,7 +14,11 @@ from fair.constraint import (
 )
 from fair.feature import BaseFeature, Course, Slot, Weekday
 from fair.item import ScheduleItem
-from fair.valuation import ConstraintSatifactionValuation, StudentValuation
+from fair.valuation import (
+    ConstraintSatifactionValuation,
+    RankValuation,
+    StudentValuation,
+)
 
 
 def test_exchange_contribution(
@@ -47,6 +54,55 @@ def test_marginal_contribution(
     )
 
 
+def test_contribution_batches(
+    course_valuation: ConstraintSatifactionValuation, all_items: list[ScheduleItem]
+):
+    for bundle in [[all_items[0]], all_items[:2], all_items]:
+        for og_item in all_items:
+            assert exchange_contribution_batch(
+                course_valuation, bundle, og_item, all_items
+            ) == [
+                exchange_contribution(course_valuation, bundle, og_item, new_item)
+                for new_item in all_items
+            ]
+        assert marginal_contribution_batch(course_valuation, bundle, all_items) == [
+            marginal_contribution(course_valuation, bundle, item) for item in all_items
+        ]
+        assert item_contributions(course_valuation, bundle) == [
+            marginal_contribution(course_valuation, bundle[:i] + bundle[i + 1 :], item)
+            for i, item in enumerate(bundle)
+        ]
+
+
+class CapacityValuation:
+    """Rank valuation that only defines independent and value, at most two items"""
+
+    def independent(self, bundle):
+        return len(bundle) == len(set(bundle)) and len(bundle) <= 2
+
+    def value(self, bundle):
+        return min(len(set(bundle)), 2)
+
+
+class CapacityRankValuation(CapacityValuation, RankValuation):
+    pass
+
+
+def test_contribution_batches_without_batch_check(all_items: list[ScheduleItem]):
+    for valuation in [CapacityValuation(), CapacityRankValuation()]:
+        for bundle in [[all_items[0]], all_items[:2]]:
+            for og_item in all_items:
+                assert exchange_contribution_batch(
+                    valuation, bundle, og_item, all_items
+                ) == [
+                    exchange_contribution(valuation, bundle, og_item, new_item)
+                    for new_item in all_items
+                ]
+            assert marginal_contribution_batch(valuation, bundle, all_items) == [
+                marginal_contribution(valuation, bundle, item) for item in all_items
+            ]
+
+
 def test_student(
     course: Course,
     slot: Slot,
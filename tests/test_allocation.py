@@ -1,9 +1,20 @@
+import numpy as np
+
 from fair.agent import LegacyStudent
 from fair.allocation import (
+    find_shortest_path,
     general_yankee_swap,
     general_yankee_swap_E,
+    get_bundle_from_allocation_matrix,
+    get_bundle_indexes_from_allocation_matrix,
+    get_owners_list,
+    initialize_allocation_matrix,
+    initialize_exchange_graph,
+    initialize_ownership,
     round_robin,
+    round_robin_weights,
     serial_dictatorship,
+    transfer_item,
 )
 from fair.feature import Course
 from fair.item import ScheduleItem
@@ -58,6 +69,46 @@ def test_general_yankee_swap_E(
     assert set(courses2) <= set(renaissance2.preferred_courses)
 
 
+def test_yankee_swap_utilities(
+    renaissance1: RenaissanceMan,
+    renaissance2: RenaissanceMan,
+    schedule: list[ScheduleItem],
+    course: Course,
+):
+    leg_student1 = LegacyStudent(renaissance1, renaissance1.preferred_courses, course)
+    leg_student2 = LegacyStudent(renaissance2, renaissance2.preferred_courses, course)
+    students = [leg_student1, leg_student2]
+
+    # every allocated item adds one to its owner's utility, which the gain tracks
+    for swap in [general_yankee_swap, general_yankee_swap_E]:
+        X, _, _ = swap(students, schedule)
+        for i, student in enumerate(students):
+            bundle = get_bundle_from_allocation_matrix(X, schedule, i)
+            assert student.valuation(bundle) == len(bundle)
+
+
+def test_yankee_swap_on_iter(
+    renaissance1: RenaissanceMan,
+    renaissance2: RenaissanceMan,
+    schedule: list[ScheduleItem],
+    course: Course,
+):
+    leg_student1 = LegacyStudent(renaissance1, renaissance1.preferred_courses, course)
+    leg_student2 = LegacyStudent(renaissance2, renaissance2.preferred_courses, course)
+
+    # the graph is reported once per iteration, and again after every transfer
+    for swap in [general_yankee_swap, general_yankee_swap_E]:
+        iterations = []
+        _, time_steps, agents_involved_arr = swap(
+            [leg_student1, leg_student2],
+            schedule,
+            on_iter=lambda G, iteration: iterations.append(iteration),
+        )
+        num_transfers = sum(1 for n in agents_involved_arr if n > 0)
+        assert len(iterations) == len(time_steps) + num_transfers
+        assert sorted(set(iterations)) == list(range(len(time_steps)))
+
+
 def test_round_robin_swap(
     renaissance1: RenaissanceMan,
     renaissance2: RenaissanceMan,
@@ -82,6 +133,50 @@ def test_round_robin_swap(
     assert set(courses2) <= set(renaissance2.preferred_courses)
 
 
+class ScalarStudent:
+    """Agent that only answers single-item contribution queries"""
+
+    def __init__(self, student: LegacyStudent):
+        self.student = student
+
+    def valuation(self, bundle):
+        return self.student.valuation(bundle)
+
+    def marginal_contribution(self, bundle, item):
+        return self.student.marginal_contribution(bundle, item)
+
+    def exchange_contribution(self, bundle, og_item, new_item):
+        return self.student.exchange_contribution(bundle, og_item, new_item)
+
+    def get_desired_items_indexes(self, items):
+        return self.student.get_desired_items_indexes(items)
+
+
+def test_scalar_agents(
+    renaissance1: RenaissanceMan,
+    renaissance2: RenaissanceMan,
+    schedule: list[ScheduleItem],
+    course: Course,
+):
+    leg_student1 = LegacyStudent(renaissance1, renaissance1.preferred_courses, course)
+    leg_student2 = LegacyStudent(renaissance2, renaissance2.preferred_courses, course)
+    students = [leg_student1, leg_student2]
+    scalar_students = [ScalarStudent(student) for student in students]
+
+    # agents without batch methods are queried one item at a time, with the same result
+    for algorithm in [general_yankee_swap, general_yankee_swap_E]:
+        X, _, _ = algorithm(students, schedule)
+        X_scalar, _, _ = algorithm(scalar_students, schedule)
+        assert (X == X_scalar).all()
+    for algorithm in [
+        round_robin,
+        lambda agents, items: round_robin_weights(agents, items, [1, 1]),
+    ]:
+        assert (
+            algorithm(students, schedule) == algorithm(scalar_students, schedule)
+        ).all()
+
+
 def test_serial_dictatorship_swap(
     renaissance1: RenaissanceMan,
     renaissance2: RenaissanceMan,
@@ -104,3 +199,51 @@ def test_serial_dictatorship_swap(
     courses2 = [schedule[i] for i in range(len(alloc2)) if alloc2[i] == 1]
     assert set(courses1) <= set(renaissance1.preferred_courses)
     assert set(courses2) <= set(renaissance2.preferred_courses)
+
+
+def test_ownership_follows_allocation():
+    X = np.array([[1, 0, 2], [0, 1, 1], [1, 1, 0]])
+    owned_items, item_owners = initialize_ownership(X, 2)
+    assert owned_items == [{0, 2}, {1, 2}]
+    assert item_owners == [{0}, {1}, {0, 1}]
+
+    transfer_item(X, 1, 0, True, owned_items, item_owners)
+    transfer_item(X, 2, 1, False, owned_items, item_owners)
+    for agent_index in range(2):
+        assert get_bundle_indexes_from_allocation_matrix(
+            X, agent_index
+        ) == get_bundle_indexes_from_allocation_matrix(X, agent_index, owned_items)
+    assert get_owners_list(X, 1, item_owners) == [0, 1]
+    assert get_owners_list(X, 1).tolist() == [0, 1]
+    assert get_owners_list(X, 2).tolist() == [0]
+
+
+def test_find_shortest_path():
+    G = initialize_exchange_graph(3)
+    del G[0]["t"]
+    del G[1]["t"]
+    G["s"] = {0: None}
+    G[0].update({1: None, 2: None})
+    G[1][2] = None
+
+    assert find_shortest_path(G, "s", "t") == ["s", 0, 2, "t"]
+
+    del G[2]["t"]
+    assert find_shortest_path(G, "s", "t") is None
+
+
+def test_allocation_matrix_dtype(schedule: list[ScheduleItem]):
+    X = initialize_allocation_matrix(schedule, [None, None])
+    assert X.dtype == np.int8
+    assert (X[:, -1] == [item.capacity for item in schedule]).all()
+
+    features = schedule[0].features
+    wide_item = ScheduleItem(features, schedule[0].values, 0, capacity=128)
+    X = initialize_allocation_matrix([wide_item], [None, None])
+    assert X.dtype == np.int16
+    assert X[0, -1] == 128
+
+    float_item = ScheduleItem(features, schedule[0].values, 0, capacity=3000.0)
+    X = initialize_allocation_matrix([float_item], [None, None])
+    assert X.dtype == np.int16
+    assert X[0, -1] == 3000
@@ -1,12 +1,14 @@
 from typing import List
 
 import numpy as np
+import pytest
 import scipy
 
 from fair.constraint import (
     CourseTimeConstraint,
     MutualExclusivityConstraint,
     PreferenceConstraint,
+    compute_extent,
     indicator,
 )
 from fair.feature import Course, Section, Slot, Weekday
@@ -22,6 +24,10 @@ def test_indicator(bundle_250_301: list[ScheduleItem]):
     ind = indicator(bundle_250_301, 3, False)
     np.testing.assert_array_equal(ind.flatten(), [1, 0, 1])
 
+    # repeated items are only indicated once
+    ind = indicator(bundle_250_301 + bundle_250_301, 3, True)
+    np.testing.assert_array_equal(ind.toarray().flatten(), [1, 0, 1])
+
 
 def test_preference_with_multiple_features(
     course: Course,
@@ -42,6 +48,29 @@ def test_preference_with_multiple_features(
     assert not constraint.satisfies(bundle_250_301_3)
 
 
+def test_constraint_extent(
+    course: Course,
+    slot: Slot,
+    weekday: Weekday,
+    schedule: list[ScheduleItem],
+):
+    extent = compute_extent(schedule)
+    assert extent == max(item.index for item in schedule) + 1
+
+    constraints = [
+        PreferenceConstraint.from_item_lists(
+            schedule, [[("250",)]], [1], [course], extent=extent + 2
+        ),
+        CourseTimeConstraint.from_items(schedule, slot, weekday, extent=extent + 2),
+        MutualExclusivityConstraint.from_items(schedule, course, extent=extent + 2),
+    ]
+    for constraint in constraints:
+        assert constraint.extent == extent + 2
+        assert constraint.A.shape[1] == extent + 2
+
+    assert MutualExclusivityConstraint.from_items(schedule, course).extent == extent
+
+
 def test_linear_constraint(
     course: Course,
     bundle_250_301_2: list[ScheduleItem],
@@ -79,6 +108,57 @@ def test_linear_constraint_250_301(
     assert linear_constraint_250_301.satisfies([schedule_item250])
 
 
+def test_delta_satisfies(
+    all_items: list[ScheduleItem],
+    schedule_item250: ScheduleItem,
+    schedule_item301: ScheduleItem,
+    schedule_item611: ScheduleItem,
+    slot: Slot,
+    weekday: Weekday,
+):
+    for sparse in [False, True]:
+        constraint = CourseTimeConstraint.from_items(all_items, slot, weekday, sparse)
+        product = constraint.product([schedule_item301])
+
+        assert not constraint.delta_satisfies(product, [schedule_item250])
+        assert constraint.delta_satisfies(product, [schedule_item611])
+        assert constraint.delta_satisfies(
+            product, [schedule_item250], [schedule_item301]
+        )
+        np.testing.assert_array_equal(
+            constraint.delta_product(product, [schedule_item611]),
+            constraint.product([schedule_item301, schedule_item611]),
+        )
+
+
+def test_satisfies_batch(
+    all_items: list[ScheduleItem],
+    schedule_item250: ScheduleItem,
+    schedule_item301: ScheduleItem,
+    schedule_item611: ScheduleItem,
+    slot: Slot,
+    weekday: Weekday,
+):
+    bundles = [
+        [],
+        [schedule_item301],
+        [schedule_item250, schedule_item301],
+        [schedule_item301, schedule_item611],
+    ]
+    for sparse in [False, True]:
+        constraint = CourseTimeConstraint.from_items(all_items, slot, weekday, sparse)
+        np.testing.assert_array_equal(
+            constraint.satisfies_batch(bundles),
+            [constraint.satisfies(bundle) for bundle in bundles],
+        )
+
+    constraint = CourseTimeConstraint.from_items(
+        [schedule_item250, schedule_item301], slot, weekday, True
+    )
+    with pytest.raises(IndexError):
+        constraint.satisfies_batch([[schedule_item611]])
+
+
 def test_time_constraint(
     all_items: list[ScheduleItem],
     bundle_250_301: list[ScheduleItem],
@@ -105,6 +185,35 @@ def test_section_constraint(
     assert not constraint.satisfies(bundle_250_250_2)
 
 
+def test_constraint_dtypes(
+    items_repeat_section: list[ScheduleItem],
+    bundle_250_250_2: list[ScheduleItem],
+    course: Course,
+):
+    for sparse in [False, True]:
+        constraint = MutualExclusivityConstraint.from_items(
+            items_repeat_section, course, sparse
+        )
+
+        # 0/1 entries and small limits are stored narrowly, products are not
+        assert constraint.A.dtype == np.int8
+        assert constraint.b.dtype == np.int16
+        assert constraint.product(bundle_250_250_2).dtype == np.int_
+
+        # A @ indicator does not wrap around, however many items a row holds
+        A = np.ones((1, 300), dtype=np.int8)
+        items = [ScheduleItem([course], ["250"], i) for i in range(300)]
+        ind = indicator(items, 300, sparse)
+        assert ind.dtype == np.int_
+        assert (A @ ind)[0, 0] == 300
+
+    # limits that do not fit in int16 keep their value
+    constraint = PreferenceConstraint.from_item_lists(
+        items_repeat_section, [[("250",)]], [40000], [course]
+    )
+    assert constraint.b[0, 0] == 40000
+
+
 def test_constrained_items(
     all_items: list[ScheduleItem],
     schedule_item250: ScheduleItem,
@@ -119,6 +228,9 @@ def test_constrained_items(
         > 0
     )
 
+    sparse_active = course_time_constraint.to_sparse().constrained_items(all_items)
+    assert sparse_active == ct_active
+
 
 def test_sparse_addition(course: Course, schedule: List[ScheduleItem]):
     constraint1 = PreferenceConstraint.from_item_lists(
@@ -131,6 +243,8 @@ def test_sparse_addition(course: Course, schedule: List[ScheduleItem]):
 
     assert constraint.A.shape[0] == constraint1.A.shape[0] + constraint2.A.shape[0]
     assert constraint._sparse
+    assert constraint.A.has_canonical_format
+    assert constraint.b.has_canonical_format
 
 
 def test_dense_addition(course: Course, schedule: List[ScheduleItem]):
@@ -0,0 +1,104 @@
+import numpy as np
+
+from fair.envy import (
+    EF1_violations,
+    EF_violations,
+    EFX_violations,
+    envy_all,
+    envy_matrix,
+)
+from fair.metrics import _count_violations
+
+
+def test_envy_matrix():
+    valuations = np.array([[1, 2, 0], [1, 1, 1], [3, 0, 2]])
+    expected = np.array(
+        [[False, True, False], [False, False, False], [True, False, False]]
+    )
+
+    np.testing.assert_array_equal(envy_matrix(valuations), expected)
+    assert EF_violations(None, [0, 1, 2], None, valuations) == (2, 2)
+
+
+def test_count_violations_per_agent():
+    checked = []
+
+    def violates(i, j):
+        checked.append((i, j))
+        return True
+
+    candidates = np.argwhere(~np.eye(3, dtype=bool))
+
+    assert _count_violations(candidates, violates, 3) == (6, 3)
+    checked.clear()
+    assert _count_violations(candidates, violates, 3, count_pairs=False) == (None, 3)
+    assert checked == [(0, 1), (1, 0), (2, 0)]
+
+
+def test_EF1_EFX_large_envy():
+    class Agent:
+        def valuation(self, bundle):
+            return 0
+
+    # envy by two or more is a violation no matter which item is dropped
+    valuations = np.array([[0, 2], [0, 1]])
+    bundles = [[], ["a", "b"]]
+    agents = [Agent(), Agent()]
+
+    assert EF1_violations(None, agents, None, bundles, valuations) == (1, 1)
+    assert EFX_violations(None, agents, None, bundles, valuations) == (1, 1)
+
+
+def test_EF1_bundles_from_allocation():
+    class Agent:
+        def item_contributions(self, bundle):
+            return [1] * len(bundle)
+
+    # bundles are taken from X when only valuations are given
+    X = np.array([[0, 1, 0], [0, 1, 0]])
+    valuations = np.array([[0, 1], [0, 2]])
+    agents = [Agent(), Agent()]
+
+    assert EF1_violations(X, agents, ["a", "b"], valuations=valuations) == (0, 0)
+    assert EFX_violations(X, agents, ["a", "b"], valuations=valuations) == (0, 0)
+
+
+def test_envy_all():
+    class Agent:
+        def item_contributions(self, bundle):
+            return [int(item == "a") for item in bundle]
+
+    X = np.array([[0, 1, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0]])
+    valuations = np.array([[0, 1, 1], [0, 2, 0], [0, 3, 1]])
+    bundles = [[], ["a", "b"], ["c"]]
+    agents = [Agent(), Agent(), Agent()]
+
+    assert envy_all(X, agents, None, bundles, valuations) == {
+        "EF": EF_violations(X, agents, None, valuations),
+        "EF1": EF1_violations(X, agents, None, bundles, valuations),
+        "EFX": EFX_violations(X, agents, None, bundles, valuations),
+    }
+    assert envy_all(X, agents, None, bundles, valuations, count_pairs=False) == {
+        "EF": EF_violations(X, agents, None, valuations),
+        "EF1": (None, 2),
+        "EFX": (None, 2),
+    }
+
+
+def test_envy_valuation_only():
+    class Agent:
+        def valuation(self, bundle):
+            return sum(item == "a" for item in bundle)
+
+    class BatchAgent(Agent):
+        def item_contributions(self, bundle):
+            return [int(item == "a") for item in bundle]
+
+    # agents without item_contributions drop one item at a time through valuation
+    X = np.array([[0, 1, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0]])
+    valuations = np.array([[0, 1, 0], [0, 1, 0], [0, 1, 0]])
+    bundles = [[], ["a", "b"], ["c"]]
+    for agents in [[Agent()] * 3, [BatchAgent()] * 3]:
+        assert EF1_violations(X, agents, None, bundles, valuations) == (0, 0)
+        assert EFX_violations(X, agents, None, bundles, valuations) == (2, 2)
+        assert envy_all(X, agents, None, bundles, valuations)["EFX"] == (2, 2)
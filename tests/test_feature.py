@@ -1,15 +1,33 @@
+import pickle
+
 import pandas as pd
+import pytest
 
 from fair.feature import Course, Slot, slot_list, slots_for_time_range
 
 
 def test_course():
-    hash(Course(["250", "301", "611"]))
+    course = Course(["250", "301", "611"])
+    hash(course)
+
+    # the cached hash is not carried over to copies
+    course_copy = pickle.loads(pickle.dumps(course))
+    assert "_hash" not in course_copy.__dict__
+    assert course_copy == course
 
 
 def test_slot_from_range(excel_schedule_path: str):
-    with open(excel_schedule_path, "rb") as fd:
-        df = pd.read_excel(fd)
+    df = pd.read_excel(excel_schedule_path)
 
     time_ranges = df["Mtg Time"].dropna().unique()
     slot = Slot.from_time_ranges(time_ranges, "15T")
+
+
+def test_domain_lookup():
+    course = Course(["250", "301", "611", "301"])
+
+    assert "301" in course
+    assert "101" not in course
+    assert course.index("301") == 1
+    with pytest.raises(ValueError):
+        course.index("101")
@@ -1,13 +1,37 @@
+import copy
+import os
+import pickle
+import shutil
+
+import pandas as pd
 import pytest
 
 from fair.feature import Course, Section
-from fair.item import DomainError, FeatureError, ScheduleItem, sub_schedule
+from fair.item import (
+    DomainError,
+    FeatureError,
+    ScheduleItem,
+    load_schedule,
+    sub_schedule,
+)
 
 
 def test_item_hash(schedule_item250: ScheduleItem):
     hash(schedule_item250)
 
 
+def test_item_copy(course: Course, section: Section):
+    sch = ScheduleItem([course, section], ["250", 1], 1)
+    hash(sch)
+
+    # copies look values up through their own features, and hash like the original
+    sch_copy = copy.deepcopy(sch)
+    assert sch_copy == sch
+    assert sch_copy.value(sch_copy.features[0]) == "250"
+    assert sch_copy.value(course) == "250"
+    assert pickle.loads(pickle.dumps(sch)).value(section) == 1
+
+
 def test_item_lt(schedule_item250: ScheduleItem, schedule_item301: ScheduleItem):
     h250 = hash(schedule_item250)
     h301 = hash(schedule_item301)
@@ -44,6 +68,36 @@ def test_schedule_excel_import(excel_schedule_path_with_cats: str):
     assert None not in [sched.category for sched in schedule_items]
 
 
+def test_load_schedule_cache(excel_schedule_path_with_cats: str, tmp_path):
+    path = str(tmp_path / "schedule.xlsx")
+    shutil.copy(excel_schedule_path_with_cats, path)
+    cache_path = str(tmp_path / "schedule.pkl")
+
+    # without a cache path nothing is written
+    df = load_schedule(path)
+    assert os.listdir(tmp_path) == ["schedule.xlsx"]
+
+    assert df.equals(load_schedule(path, cache_path))
+    assert os.path.exists(cache_path)
+
+    # second load is served from the snapshot
+    assert df.equals(load_schedule(path, cache_path))
+
+    # a snapshot of different contents is ignored
+    pd.to_pickle({"sha256": "stale", "schedule": df.head(1)}, cache_path)
+    assert df.equals(load_schedule(path, cache_path))
+
+    # a truncated snapshot is ignored and replaced
+    with open(cache_path, "r+b") as fd:
+        fd.truncate(16)
+    assert df.equals(load_schedule(path, cache_path))
+    assert pd.read_pickle(cache_path)["schedule"].equals(df)
+
+    # an unwritable snapshot location does not prevent loading
+    missing = str(tmp_path / "missing" / "schedule.pkl")
+    assert df.equals(load_schedule(path, missing))
+
+
 def test_subschedule(course: Course, section: Section):
     sch1 = ScheduleItem([course, section], ["301", 1], 1, capacity=2)
     sch2 = ScheduleItem([course, section], ["250", 1], 1, capacity=3)
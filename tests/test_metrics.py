@@ -0,0 +1,91 @@
+import numpy as np
+
+from fair.agent import LegacyStudent
+from fair.allocation import general_yankee_swap, get_bundle_from_allocation_matrix
+from fair.feature import Course
+from fair.item import ScheduleItem
+from fair.metrics import (
+    leximin,
+    nash_welfare,
+    precompute_bundles_valuations,
+    utilitarian_welfare,
+)
+from fair.simulation import RenaissanceMan
+
+
+def test_precomputed_valuations(
+    renaissance1: RenaissanceMan,
+    renaissance2: RenaissanceMan,
+    schedule: list[ScheduleItem],
+    course: Course,
+):
+    leg_student1 = LegacyStudent(renaissance1, renaissance1.preferred_courses, course)
+    leg_student2 = LegacyStudent(renaissance2, renaissance2.preferred_courses, course)
+    students = [leg_student1, leg_student2]
+
+    X, _, _ = general_yankee_swap(students, schedule)
+    _, valuations = precompute_bundles_valuations(X, students, schedule)
+
+    # rank valuations are small integers
+    assert valuations.dtype == np.int8
+
+    # metrics agree whether or not valuations are supplied
+    assert utilitarian_welfare(X, students, schedule) == utilitarian_welfare(
+        X, students, schedule, valuations
+    )
+    assert nash_welfare(X, students, schedule) == nash_welfare(
+        X, students, schedule, valuations
+    )
+    assert leximin(X, students, schedule) == leximin(X, students, schedule, valuations)
+
+
+def test_precomputed_bundles(
+    renaissance1: RenaissanceMan,
+    renaissance2: RenaissanceMan,
+    schedule: list[ScheduleItem],
+    course: Course,
+):
+    leg_student1 = LegacyStudent(renaissance1, renaissance1.preferred_courses, course)
+    leg_student2 = LegacyStudent(renaissance2, renaissance2.preferred_courses, course)
+    students = [leg_student1, leg_student2]
+
+    X, _, _ = general_yankee_swap(students, schedule)
+    bundles, _ = precompute_bundles_valuations(X, students, schedule)
+
+    for i in range(len(students)):
+        assert bundles[i] == get_bundle_from_allocation_matrix(X, schedule, i)
+
+
+def test_nash_welfare_int8():
+    valuations = np.array([[4, 0, 0], [0, 3, 0], [0, 0, 3]], dtype=np.int8)
+    num_zeros, nsw = nash_welfare(None, [0, 1, 2], None, valuations)
+
+    assert num_zeros == 0
+    np.testing.assert_allclose(nsw, 36 ** (1 / 3))
+
+
+def test_leximin_worst_k():
+    valuations = np.diag(np.array([2, 5, 1, 4], dtype=np.int8))
+
+    assert leximin(None, [0, 1, 2, 3], None, valuations) == [5, 4, 2, 1]
+    assert leximin(None, [0, 1, 2, 3], None, valuations, k=2) == [2, 1]
+    assert leximin(None, [0, 1, 2, 3], None, valuations, k=10) == [5, 4, 2, 1]
+
+
+def test_precomputed_shared_bundles(
+    renaissance1: RenaissanceMan,
+    renaissance2: RenaissanceMan,
+    schedule: list[ScheduleItem],
+    course: Course,
+):
+    leg_student1 = LegacyStudent(renaissance1, renaissance1.preferred_courses, course)
+    leg_student2 = LegacyStudent(renaissance2, renaissance2.preferred_courses, course)
+    students = [leg_student1, leg_student2]
+
+    # nothing allocated, both agents hold the empty bundle
+    X = np.zeros((len(schedule), len(students) + 1))
+    X[:, -1] = 1
+    bundles, valuations = precompute_bundles_valuations(X, students, schedule)
+
+    assert bundles == [[], []]
+    np.testing.assert_array_equal(valuations, np.zeros((2, 2)))
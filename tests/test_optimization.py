@@ -73,3 +73,28 @@ def test_capacity_constraint(course: Course):
 
     # now it's possible to allocate each of the three courses twice
     assert np.sum(opt_alloc) == 6
+
+
+def test_compile_once(course: Course):
+    schedule = [
+        ScheduleItem([course], ["250"], 0),
+        ScheduleItem([course], ["301"], 1),
+        ScheduleItem([course], ["611"], 2),
+    ]
+    constraint = PreferenceConstraint.from_item_lists(
+        schedule, [[("250",), ("301",), ("611",)]], [3], [course]
+    )
+    valuation = ConstraintSatifactionValuation([constraint])
+    agents = [BaseAgent(valuation), BaseAgent(valuation)]
+
+    program = StudentAllocationProgram(agents, schedule).compile()
+    A = program.A
+
+    # recompiling neither rebuilds nor duplicates the capacity constraints
+    assert program.compile().A is A
+
+    # constraints are shared between formulations
+    program.formulateUSW()
+    constraint = program.constraint
+    assert program.formulateUSW().constraint is constraint
+    assert np.sum(program.solve()) == 3
@@ -1,3 +1,5 @@
+import numpy as np
+
 from fair.constraint import CourseTimeConstraint, MutualExclusivityConstraint
 from fair.feature import Course, Section, Slot, Weekday
 from fair.item import ScheduleItem, sub_schedule
@@ -138,3 +140,22 @@ def test_sub_student(
 
     assert len(new_student.preferred_courses) < len(renaissance3.preferred_courses)
     assert new_student.value(reduced_schedule) == renaissance3.value(bundle)
+
+
+def test_renaissance_man_packed_topics(
+    course: Course,
+    section: Section,
+    schedule: list[ScheduleItem],
+):
+    topic_list = [[schedule[0], schedule[2]], [schedule[4]]]
+
+    # topics packed contiguously with offsets, as slices of a single array
+    flat = np.array([item for topic in topic_list for item in topic], dtype=object)
+    offsets = np.cumsum([0] + [len(topic) for topic in topic_list])
+    packed = [flat[offsets[t] : offsets[t + 1]] for t in range(len(topic_list))]
+
+    args = ([1, 1], 1, 2, course, section, [], schedule, 0)
+    student = RenaissanceMan(topic_list, *args)
+    packed_student = RenaissanceMan(packed, *args)
+
+    assert student.preferred_topics == packed_student.preferred_topics
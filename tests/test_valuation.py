@@ -1,6 +1,7 @@
+import pickle
 from typing import List
 
-from fair.constraint import LinearConstraint, PreferenceConstraint
+from fair.constraint import BaseConstraint, LinearConstraint, PreferenceConstraint
 from fair.feature import Course
 from fair.item import ScheduleItem
 from fair.valuation import ConstraintSatifactionValuation, UniqueItemsValuation
@@ -41,6 +42,17 @@ def test_unique_item_adapter(
     assert unique_valuation.value(bundle) == 1
 
 
+def test_unique_item_adapter_pickle(
+    schedule_item250: ScheduleItem, linear_constraint_250_301: LinearConstraint
+):
+    original_valuation = ConstraintSatifactionValuation([linear_constraint_250_301])
+    unique_valuation = pickle.loads(
+        pickle.dumps(UniqueItemsValuation(original_valuation))
+    )
+
+    assert unique_valuation.value([schedule_item250, schedule_item250]) == 1
+
+
 def test_memoization(
     schedule_item250: ScheduleItem, all_items: List[ScheduleItem], course: Course
 ):
@@ -67,6 +79,31 @@ def test_memoization(
     assert valuation._unique_independent_ct == before_independent
 
 
+class SatisfiesOnlyConstraint(BaseConstraint):
+    """Constraint that only implements satisfies"""
+
+    def __init__(self, constraint: LinearConstraint):
+        self.constraint = constraint
+
+    def satisfies(self, bundle):
+        return self.constraint.satisfies(bundle)
+
+
+def test_value_without_incremental_constraint(
+    all_items: List[ScheduleItem], course: Course
+):
+    constraint = PreferenceConstraint.from_item_lists(
+        all_items, [[("250",), ("301",), ("611",)]], [2], [course]
+    )
+    valuation = ConstraintSatifactionValuation([constraint])
+    fallback = ConstraintSatifactionValuation([SatisfiesOnlyConstraint(constraint)])
+
+    assert fallback.value(all_items) == valuation.value(all_items)
+    assert fallback._independent_ct == valuation._independent_ct
+    # greedy checks go through independent, so their results are memoized
+    assert len(fallback._independent_memo) > len(valuation._independent_memo)
+
+
 def test_disable_memoize(
     schedule_item250: ScheduleItem, all_items: List[ScheduleItem], course: Course
 ):
@@ -99,6 +136,21 @@ def test_reset_memo_cache(
     assert valuation._unique_value_ct == 0
 
 
+def test_independent_batch(
+    bundle_301_611: list[ScheduleItem],
+    all_items: list[ScheduleItem],
+    all_courses_constraint: LinearConstraint,
+):
+    valuation = ConstraintSatifactionValuation([all_courses_constraint])
+    bundles = [all_items, bundle_301_611, all_items]
+    assert valuation.independent_batch(bundles) == [False, True, False]
+    assert valuation._independent_ct == 3
+    assert valuation._unique_independent_ct == 2
+
+    adapter = UniqueItemsValuation(valuation)
+    assert adapter.independent_batch([bundle_301_611 + bundle_301_611]) == [True]
+
+
 def test_valuation_compilation(
     bundle_250_301: list[ScheduleItem], all_courses_constraint: LinearConstraint
 ):